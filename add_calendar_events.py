@@ -88,16 +88,37 @@ AWARENESS_DAYS = [
     (date(2025, 12, 3), "International Day of People with Disabilities", "Awareness Day"),
 ]
 
+MONTHS = {
+    1: 'January', 2: 'February', 3: 'March', 4: 'April', 5: 'May', 6: 'June',
+    7: 'July', 8: 'August', 9: 'September', 10: 'October', 11: 'November', 12: 'December',
+}
+
+DESC_HOLIDAY = "South African Public Holiday"
+DESC_AWARENESS = "Awareness Day / Special Day"
+
+# Days that depend on weekdays (like Mother's Day) move each year, so not recurring
+NON_RECURRING_DAYS = frozenset({"Mother's Day", "Father's Day", "World Kidney Day"})
+
+# (date, title, type, description, is_recurring) for every event, processed in one pass.
+# Holidays can shift, so they are never recurring; fixed-date awareness days are.
+ALL_EVENTS = [
+    (event_date, title, event_type, DESC_HOLIDAY, False)
+    for event_date, title, event_type in SA_PUBLIC_HOLIDAYS
+] + [
+    (event_date, title, event_type, DESC_AWARENESS, title not in NON_RECURRING_DAYS)
+    for event_date, title, event_type in AWARENESS_DAYS
+]
+
 
 def add_events():
     """Add all events to the calendar."""
     app = create_app()
 
     with app.app_context():
-        # Get a user to set as creator (Super Admin or first user)
-        admin = User.query.filter_by(role='Super Admin').first()
-        if not admin:
-            admin = User.query.first()
+        # Get a user to set as creator (Super Admin, else the first user) in one query
+        admin = User.query.order_by(
+            db.case((User.role == 'Super Admin', 0), else_=1), User.id
+        ).first()
 
         if not admin:
             print("ERROR: No users found in database. Please create a user first.")
@@ -107,75 +128,53 @@ def add_events():
 
         added_count = 0
         skipped_count = 0
+        rows = []
+        log_lines = []
 
-        # Add public holidays
-        print("=" * 50)
-        print("ADDING SOUTH AFRICAN PUBLIC HOLIDAYS")
-        print("=" * 50)
-
-        for event_date, title, event_type in SA_PUBLIC_HOLIDAYS:
-            # Check if already exists
-            existing = CalendarEvent.query.filter_by(
-                title=title,
-                event_date=event_date
-            ).first()
-
-            if existing:
-                print(f"  SKIP: {title} ({event_date}) - already exists")
-                skipped_count += 1
-                continue
-
-            event = CalendarEvent(
-                title=title,
-                description=f"South African Public Holiday",
-                event_date=event_date,
-                event_type=event_type,
-                is_recurring=False,  # Holidays can shift, so not recurring
-                created_by=admin.id
-            )
-            db.session.add(event)
-            print(f"  ADD:  {title} - {event_date.strftime('%d %B %Y')}")
-            added_count += 1
+        # Load existing (title, date) pairs once instead of querying per event
+        existing = {
+            (title, event_date)
+            for title, event_date in db.session.query(CalendarEvent.title, CalendarEvent.event_date).all()
+        }
 
-        # Add awareness days
-        print("\n" + "=" * 50)
-        print("ADDING AWARENESS DAYS & SPECIAL DAYS")
+        print("=" * 50)
+        print("ADDING PUBLIC HOLIDAYS, AWARENESS DAYS & SPECIAL DAYS")
         print("=" * 50)
 
-        for event_date, title, event_type in AWARENESS_DAYS:
+        for event_date, title, event_type, description, is_recurring in ALL_EVENTS:
             # Check if already exists
-            existing = CalendarEvent.query.filter_by(
-                title=title,
-                event_date=event_date
-            ).first()
-
-            if existing:
-                print(f"  SKIP: {title} ({event_date}) - already exists")
+            if (title, event_date) in existing:
+                log_lines.append(f"  SKIP: {title} ({event_date}) - already exists")
                 skipped_count += 1
                 continue
 
-            # Some days are always on the same date, mark as recurring
-            # Days that depend on weekdays (like Mother's Day) are not recurring
-            non_recurring_days = [
-                "Mother's Day", "Father's Day", "World Kidney Day"
-            ]
-            is_recurring = title not in non_recurring_days
-
-            event = CalendarEvent(
-                title=title,
-                description=f"Awareness Day / Special Day",
-                event_date=event_date,
-                event_type=event_type,
-                is_recurring=is_recurring,
-                created_by=admin.id
-            )
-            db.session.add(event)
+            rows.append({
+                'title': title,
+                'description': description,
+                'event_date': event_date,
+                'event_type': event_type,
+                'is_recurring': is_recurring,
+                'created_by': admin.id
+            })
+            existing.add((title, event_date))
             recurring_note = " (recurring)" if is_recurring else ""
-            print(f"  ADD:  {title} - {event_date.strftime('%d %B %Y')}{recurring_note}")
+            log_lines.append(
+                f"  ADD:  {title} - {event_date.day:02d} {MONTHS[event_date.month]} {event_date.year}{recurring_note}"
+            )
             added_count += 1
 
-        # Commit all changes
-        db.session.commit()
+        # Print the per-event log in one write rather than a flush per line
+        print("\n".join(log_lines))
+
+        # Bulk insert all new events without building ORM instances, then commit once
+        try:
+            with db.session.no_autoflush:
+                if rows:
+                    db.session.bulk_insert_mappings(CalendarEvent, rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
 
         print("\n" + "=" * 50)
         print(f"SUMMARY: Added {added_count} events, skipped {skipped_count} existing")
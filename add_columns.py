@@ -0,0 +1,48 @@
+"""
+Script to add any columns declared on the models that are missing from
+existing tables. db.create_all() only creates columns together with new
+tables, so run this (and then add_indexes.py) after pulling model changes
+against an existing database.
+Run with: python add_columns.py
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from app import create_app, db
+import app.models  # noqa: F401 - register all models on the metadata
+
+
+def add_columns():
+    """Add missing columns to every existing table."""
+    app = create_app()
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
+        preparer = db.engine.dialect.identifier_preparer
+
+        added_count = 0
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+
+                existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing_columns:
+                        continue
+                    column_ddl = str(CreateColumn(column).compile(dialect=db.engine.dialect))
+                    # CreateColumn leaves foreign keys to the table DDL, so add them inline
+                    for fk in column.foreign_keys:
+                        column_ddl += f" REFERENCES {preparer.format_table(fk.column.table)} ({preparer.quote(fk.column.name)})"
+                        if fk.ondelete:
+                            column_ddl += f" ON DELETE {fk.ondelete}"
+                    conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}"))
+                    print(f"  ADD:  {column.name} on {table.name}")
+                    added_count += 1
+
+        print(f"\nSUMMARY: Added {added_count} columns")
+
+
+if __name__ == "__main__":
+    add_columns()
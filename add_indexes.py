@@ -0,0 +1,38 @@
+"""
+Script to create any database indexes declared on the models that are missing.
+db.create_all() only creates indexes together with new tables, so run this
+after pulling model changes against an existing database.
+Run with: python add_indexes.py
+"""
+
+from sqlalchemy import inspect
+from app import create_app, db
+import app.models  # noqa: F401 - register all models on the metadata
+
+
+def add_indexes():
+    """Create missing indexes for every existing table."""
+    app = create_app()
+
+    with app.app_context():
+        inspector = inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
+
+        created_count = 0
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_indexes = {ix['name'] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(bind=db.engine)
+                print(f"  ADD:  {index.name} on {table.name}")
+                created_count += 1
+
+        print(f"\nSUMMARY: Created {created_count} indexes")
+
+
+if __name__ == "__main__":
+    add_indexes()
@@ -1,7 +1,14 @@
-from app import create_app
+from app import create_app, db
 
 app = create_app()
 
+# Open the first pooled connection during cold start instead of on the first request
+with app.app_context():
+    try:
+        db.engine.connect().close()
+    except Exception as e:
+        app.logger.warning(f'Database warm-up failed: {e}')
+
 # Vercel serverless handler
 def handler(request):
     return app(request.environ, lambda *args: None)
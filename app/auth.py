@@ -33,6 +33,10 @@ def login():
             flash('Your account has been deactivated. Please contact your manager.', 'danger')
             return redirect(url_for('auth.login'))
 
+        # Upgrade legacy password hashes; committed with the audit entry below
+        if user.password_needs_rehash():
+            user.set_password(form.password.data)
+
         login_user(user, remember=True)
         log_audit('User Login', 'User', user.id, {'username': user.username})
 
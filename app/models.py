@@ -1,8 +1,15 @@
 from datetime import datetime
+from flask import g
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from app import db, login_manager
 
+# Argon2id password hasher. argon2-cffi releases the GIL while hashing, so
+# concurrent logins on threaded workers don't serialize on password checks.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -11,29 +18,41 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     full_name = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(50), nullable=False)  # Staff, Receptionist, Dentist, Dental Assistant, Cleaner, Practice Manager, Super Admin
-    email = db.Column(db.String(100))
+    role = db.Column(db.String(50), nullable=False, index=True)  # Staff, Receptionist, Dentist, Dental Assistant, Cleaner, Practice Manager, Super Admin
+    email = db.Column(db.String(100), index=True)
     phone = db.Column(db.String(20))
     start_date = db.Column(db.Date)
-    status = db.Column(db.String(20), default='Active')  # Active/Inactive
+    status = db.Column(db.String(20), default='Active', index=True)  # Active/Inactive
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Relationships
-    receipts = db.relationship('Receipt', backref='creator', lazy='dynamic', foreign_keys='Receipt.created_by')
-    assigned_tasks = db.relationship('Task', backref='assignee', lazy='dynamic', foreign_keys='Task.assigned_to')
-    created_tasks = db.relationship('Task', backref='creator', lazy='dynamic', foreign_keys='Task.created_by')
-    schedules = db.relationship('Schedule', backref='staff', lazy='dynamic', foreign_keys='Schedule.staff_id')
-    leave_requests = db.relationship('LeaveRequest', backref='staff', lazy='dynamic', foreign_keys='LeaveRequest.staff_id')
-    kpi_scores = db.relationship('KPIScore', backref='staff', lazy='dynamic', foreign_keys='KPIScore.staff_id')
-    performance_events = db.relationship('PerformanceEvent', backref='staff', lazy='dynamic', foreign_keys='PerformanceEvent.staff_id')
-    sop_acknowledgements = db.relationship('SOPAcknowledgement', backref='staff', lazy='dynamic')
-    warnings_received = db.relationship('Warning', backref='staff', lazy='dynamic', foreign_keys='Warning.staff_id')
+    # Relationships (raise_on_sql: query collections explicitly, or batch with selectinload())
+    receipts = db.relationship('Receipt', backref='creator', lazy='raise_on_sql', foreign_keys='Receipt.created_by')
+    assigned_tasks = db.relationship('Task', backref='assignee', lazy='raise_on_sql', foreign_keys='Task.assigned_to')
+    created_tasks = db.relationship('Task', backref='creator', lazy='raise_on_sql', foreign_keys='Task.created_by')
+    schedules = db.relationship('Schedule', backref='staff', lazy='raise_on_sql', foreign_keys='Schedule.staff_id')
+    leave_requests = db.relationship('LeaveRequest', backref='staff', lazy='raise_on_sql', foreign_keys='LeaveRequest.staff_id')
+    kpi_scores = db.relationship('KPIScore', backref='staff', lazy='raise_on_sql', foreign_keys='KPIScore.staff_id')
+    performance_events = db.relationship('PerformanceEvent', backref='staff', lazy='raise_on_sql', foreign_keys='PerformanceEvent.staff_id')
+    sop_acknowledgements = db.relationship('SOPAcknowledgement', backref='staff', lazy='raise_on_sql')
+    warnings_received = db.relationship('Warning', backref='staff', lazy='raise_on_sql', foreign_keys='Warning.staff_id')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not self.password_hash.startswith('$argon2'):
+            # Legacy werkzeug hash (upgraded to Argon2 on next login)
+            return check_password_hash(self.password_hash, password)
+        try:
+            return password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def password_needs_rehash(self):
+        """True if the stored hash is legacy or uses outdated Argon2 parameters."""
+        if not self.password_hash.startswith('$argon2'):
+            return True
+        return password_hasher.check_needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -41,7 +60,12 @@ class User(UserMixin, db.Model):
 
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    # Memoize on g so repeated current_user lookups cost one SELECT per request
+    user = getattr(g, '_user_cache', None)
+    if user is None or user.id != int(id):
+        user = db.session.get(User, int(id))
+        g._user_cache = user
+    return user
 
 
 class Receipt(db.Model):
@@ -49,7 +73,7 @@ class Receipt(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     receipt_number = db.Column(db.String(50), unique=True, nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     payment_method = db.Column(db.String(20), nullable=False)  # Cash/Card/EFT
     description = db.Column(db.Text)
@@ -77,6 +101,9 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Covers "my open tasks" and per-assignee completion counts
+    __table_args__ = (db.Index('ix_task_assignee_status', 'assigned_to', 'status'),)
+
     def __repr__(self):
         return f'<Task {self.title}>'
 
@@ -121,6 +148,9 @@ class LeaveRequest(db.Model):
 
     approver = db.relationship('User', foreign_keys=[approved_by], backref='approved_leaves')
 
+    # Covers a staff member's leave by status and date range (balances, schedule conflicts)
+    __table_args__ = (db.Index('ix_leave_request_staff_status_start', 'staff_id', 'status', 'start_date'),)
+
     def __repr__(self):
         return f'<LeaveRequest {self.staff_id} {self.leave_type}>'
 
@@ -134,6 +164,8 @@ class KPIScore(db.Model):
     kpi_id = db.Column(db.Integer, db.ForeignKey('role_kpis.id'), nullable=False)
     month = db.Column(db.Integer, nullable=False)  # 1-12
     year = db.Column(db.Integer, nullable=False)
+    # Month as one sortable integer (e.g. 202603), generated by the database from year and month
+    period = db.Column(db.Integer, db.Computed('year * 100 + month'))
     score = db.Column(db.Integer, nullable=False)  # 0 = Not Met, 1 = Met
     notes = db.Column(db.Text)
     scored_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -143,7 +175,18 @@ class KPIScore(db.Model):
     kpi = db.relationship('RoleKPI', backref='scores')
     scorer = db.relationship('User', foreign_keys=[scored_by], backref='scored_kpis')
 
-    __table_args__ = (db.UniqueConstraint('staff_id', 'kpi_id', 'month', 'year', name='unique_staff_kpi_month'),)
+    # The unique constraint also serves staff_id lookups; the period indexes serve
+    # month-range analytics and per-staff monthly scores
+    __table_args__ = (
+        db.UniqueConstraint('staff_id', 'kpi_id', 'month', 'year', name='unique_staff_kpi_month'),
+        db.Index('ix_kpi_score_period_key', 'period'),
+        db.Index('ix_kpi_score_staff_period_key', 'staff_id', 'period'),
+    )
+
+    @staticmethod
+    def period_of(month, year):
+        """The period value stored for a month (same formula as the generated column)."""
+        return year * 100 + month
 
     def __repr__(self):
         return f'<KPIScore {self.staff_id} KPI:{self.kpi_id} {self.month}/{self.year}>'
@@ -220,12 +263,12 @@ class AuditLog(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    action = db.Column(db.String(100), nullable=False)
+    action = db.Column(db.String(100), nullable=False, index=True)
     entity_type = db.Column(db.String(50))
     entity_id = db.Column(db.Integer)
     details = db.Column(db.JSON)
     ip_address = db.Column(db.String(50))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     user = db.relationship('User', foreign_keys=[user_id], backref='audit_logs')
 
@@ -278,11 +321,20 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     notification_type = db.Column(db.String(50), nullable=False)  # task_overdue/leave_pending/warning/kpi_low/general
     link = db.Column(db.String(500))  # Optional link to related page
+    related_task_id = db.Column(db.Integer, db.ForeignKey('tasks.id', ondelete='SET NULL'))  # Task overdue/reminder notifications are about
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', foreign_keys=[user_id], backref='notifications')
 
+    # Cover unread counts, mark-all-read and clear-all per user (with or without a
+    # type), and the "already notified about this task today?" checks
+    __table_args__ = (
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', created_at.desc()),
+        db.Index('ix_notification_user_type_read', 'user_id', 'notification_type', 'is_read'),
+        db.Index('ix_notification_user_type_task_created', 'user_id', 'notification_type', 'related_task_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<Notification {self.title} for {self.user_id}>'
 
@@ -313,6 +365,9 @@ class Announcement(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime)  # Optional expiry date
 
+    # Populated per query with with_expression() (e.g. a short content excerpt for listings)
+    content_preview = db.query_expression()
+
     creator = db.relationship('User', foreign_keys=[created_by], backref='announcements')
 
     def __repr__(self):
@@ -338,6 +393,9 @@ class CalendarEvent(db.Model):
     staff = db.relationship('User', foreign_keys=[staff_id], backref='birthday_events')
     creator = db.relationship('User', foreign_keys=[created_by], backref='created_calendar_events')
 
+    # Covers month-range lookups on event_date and the (title, date) duplicate check
+    __table_args__ = (db.Index('ix_calendar_event_date_title', 'event_date', 'title'),)
+
     def __repr__(self):
         return f'<CalendarEvent {self.title} on {self.event_date}>'
 
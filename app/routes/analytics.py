@@ -2,13 +2,52 @@
 from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
-from sqlalchemy import func
-from app import db
+from sqlalchemy import func, case, event, text
+from app import db, cache
 from app.models import Receipt, Task, User, KPIScore, Warning, LeaveRequest, PerformanceEvent
 from app.utils.decorators import manager_required
 
 bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
+# Chart endpoints whose responses are cached (aggregates shared by all viewers)
+CACHED_ENDPOINTS = [
+    'receipts_by_day', 'receipts_by_method', 'tasks_by_status',
+    'kpi_trends', 'staff_performance', 'monthly_summary',
+]
+
+# Seconds a chart stays cached. Writes drop cached charts only in the process that made
+# them, so with the default per-process SimpleCache this bounds staleness on other instances
+ANALYTICS_CACHE_TIMEOUT = 60
+
+# One row per day from :start to :end inclusive, per database dialect
+DAY_SERIES_SQL = {
+    'postgresql': (
+        "SELECT CAST(d AS date) AS day "
+        "FROM generate_series(CAST(:start AS date), CAST(:end AS date), INTERVAL '1 day') AS d"
+    ),
+    'sqlite': (
+        "WITH RECURSIVE s(day) AS ("
+        "SELECT date(:start) UNION ALL SELECT date(day, '+1 day') FROM s WHERE day < date(:end)"
+        ") SELECT day FROM s"
+    ),
+}
+
+
+def analytics_cache_key():
+    """Cache key per endpoint and day, so cached aggregates never outlive the date they cover."""
+    return f'{request.endpoint}:{date.today()}'
+
+
+def clear_analytics_cache(*args):
+    """Drop today's cached chart data (used as a SQLAlchemy mapper event listener)."""
+    cache.delete_many(*[f'analytics.{name}:{date.today()}' for name in CACHED_ENDPOINTS])
+
+
+# Invalidate cached charts whenever a row they aggregate is written
+for model in (Receipt, Task, KPIScore, Warning, LeaveRequest):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, clear_analytics_cache)
+
 
 @bp.route('/')
 @login_required
@@ -20,37 +59,31 @@ def index():
 
 @bp.route('/api/receipts-by-day')
 @login_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def receipts_by_day():
     """Get receipts totals by day for the last 30 days."""
     end_date = date.today()
     start_date = end_date - timedelta(days=30)
 
-    results = db.session.query(
-        Receipt.date,
-        func.sum(Receipt.amount).label('total')
-    ).filter(
-        Receipt.date >= start_date,
-        Receipt.date <= end_date
-    ).group_by(Receipt.date).order_by(Receipt.date).all()
-
-    # Fill in missing days with 0
-    data = {}
-    current = start_date
-    while current <= end_date:
-        data[current.isoformat()] = 0
-        current += timedelta(days=1)
-
-    for row in results:
-        data[row.date.isoformat()] = float(row.total)
+    # Zero-fill missing days in SQL by left-joining receipts onto a generated day series
+    series = DAY_SERIES_SQL.get(db.engine.dialect.name, DAY_SERIES_SQL['sqlite'])
+    results = db.session.execute(text(f"""
+        SELECT days.day AS day, COALESCE(SUM(receipts.amount), 0) AS total
+        FROM ({series}) AS days
+        LEFT JOIN receipts ON receipts.date = days.day
+        GROUP BY days.day
+        ORDER BY days.day
+    """), {'start': start_date.isoformat(), 'end': end_date.isoformat()}).all()
 
     return jsonify({
-        'labels': list(data.keys()),
-        'values': list(data.values())
+        'labels': [str(row.day) for row in results],
+        'values': [float(row.total) for row in results]
     })
 
 
 @bp.route('/api/receipts-by-method')
 @login_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def receipts_by_method():
     """Get receipts breakdown by payment method for current month."""
     start_of_month = date.today().replace(day=1)
@@ -70,6 +103,7 @@ def receipts_by_method():
 
 @bp.route('/api/tasks-by-status')
 @login_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def tasks_by_status():
     """Get task counts by status."""
     results = db.session.query(
@@ -86,33 +120,42 @@ def tasks_by_status():
 @bp.route('/api/kpi-trends')
 @login_required
 @manager_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def kpi_trends():
-    """Get KPI score trends over the last 8 weeks."""
-    weeks = []
-    scores = []
-
-    for i in range(7, -1, -1):
-        week_start = date.today() - timedelta(days=date.today().weekday() + (i * 7))
-        week_end = week_start + timedelta(days=6)
+    """Get KPI score trends over the last 8 months."""
+    today = date.today()
+    # Months as a single running index (year * 12 + month - 1) so ranges cross year boundaries
+    current_index = today.year * 12 + today.month - 1
+    first_index = current_index - 7
+    first_year, first_month = divmod(first_index, 12)
+
+    # One grouped query for all 8 months instead of two COUNTs per month
+    results = db.session.query(
+        KPIScore.period,
+        func.count(KPIScore.id).label('total'),
+        func.sum(case((KPIScore.score == 1, 1), else_=0)).label('met')
+    ).filter(
+        KPIScore.period.between(
+            KPIScore.period_of(first_month + 1, first_year),
+            KPIScore.period_of(today.month, today.year)
+        )
+    ).group_by(KPIScore.period).all()
 
-        total = db.session.query(func.count(KPIScore.id)).filter(
-            KPIScore.week_start_date >= week_start,
-            KPIScore.week_start_date <= week_end
-        ).scalar() or 0
+    totals = {r.period: (r.total, r.met or 0) for r in results}
 
-        met = db.session.query(func.count(KPIScore.id)).filter(
-            KPIScore.week_start_date >= week_start,
-            KPIScore.week_start_date <= week_end,
-            KPIScore.score == 1
-        ).scalar() or 0
+    months = []
+    scores = []
 
+    for index in range(first_index, current_index + 1):
+        year, month = divmod(index, 12)
+        total, met = totals.get(KPIScore.period_of(month + 1, year), (0, 0))
         percentage = (met / total * 100) if total > 0 else 0
 
-        weeks.append(week_start.strftime('%d %b'))
+        months.append(date(year, month + 1, 1).strftime('%b %Y'))
         scores.append(round(percentage, 1))
 
     return jsonify({
-        'labels': weeks,
+        'labels': months,
         'values': scores
     })
 
@@ -120,10 +163,39 @@ def kpi_trends():
 @bp.route('/api/staff-performance')
 @login_required
 @manager_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def staff_performance():
     """Get performance comparison across staff members."""
     staff = User.query.filter_by(status='Active').all()
 
+    # KPI totals per staff member for the months covering the last 30 days
+    cutoff = date.today() - timedelta(days=30)
+    kpi_totals = {
+        row.staff_id: (row.total, row.met or 0)
+        for row in db.session.query(
+            KPIScore.staff_id,
+            func.count(KPIScore.id).label('total'),
+            func.sum(case((KPIScore.score == 1, 1), else_=0)).label('met')
+        ).filter(
+            KPIScore.period >= KPIScore.period_of(cutoff.month, cutoff.year)
+        ).group_by(KPIScore.staff_id)
+    }
+
+    # Task totals per assignee
+    task_totals = {
+        row.assigned_to: (row.total, row.done or 0)
+        for row in db.session.query(
+            Task.assigned_to,
+            func.count(Task.id).label('total'),
+            func.sum(case((Task.status == 'Done', 1), else_=0)).label('done')
+        ).group_by(Task.assigned_to)
+    }
+
+    # Warning counts per staff member
+    warning_totals = dict(
+        db.session.query(Warning.staff_id, func.count(Warning.id)).group_by(Warning.staff_id).all()
+    )
+
     labels = []
     kpi_scores = []
     task_completion = []
@@ -133,27 +205,17 @@ def staff_performance():
         labels.append(member.full_name.split()[0])  # First name only
 
         # KPI average (last 30 days)
-        total_kpis = KPIScore.query.filter(
-            KPIScore.staff_id == member.id,
-            KPIScore.week_start_date >= date.today() - timedelta(days=30)
-        ).count()
-        met_kpis = KPIScore.query.filter(
-            KPIScore.staff_id == member.id,
-            KPIScore.week_start_date >= date.today() - timedelta(days=30),
-            KPIScore.score == 1
-        ).count()
+        total_kpis, met_kpis = kpi_totals.get(member.id, (0, 0))
         kpi_pct = (met_kpis / total_kpis * 100) if total_kpis > 0 else 0
         kpi_scores.append(round(kpi_pct, 1))
 
         # Task completion rate
-        total_tasks = Task.query.filter_by(assigned_to=member.id).count()
-        done_tasks = Task.query.filter_by(assigned_to=member.id, status='Done').count()
+        total_tasks, done_tasks = task_totals.get(member.id, (0, 0))
         task_pct = (done_tasks / total_tasks * 100) if total_tasks > 0 else 0
         task_completion.append(round(task_pct, 1))
 
         # Warning count
-        warnings = Warning.query.filter_by(staff_id=member.id).count()
-        warning_counts.append(warnings)
+        warning_counts.append(warning_totals.get(member.id, 0))
 
     return jsonify({
         'labels': labels,
@@ -166,42 +228,44 @@ def staff_performance():
 @bp.route('/api/monthly-summary')
 @login_required
 @manager_required
+@cache.cached(timeout=ANALYTICS_CACHE_TIMEOUT, key_prefix=analytics_cache_key)
 def monthly_summary():
     """Get summary stats for the current month."""
     start_of_month = date.today().replace(day=1)
-
-    # Revenue
-    total_revenue = db.session.query(func.sum(Receipt.amount)).filter(
-        Receipt.date >= start_of_month
-    ).scalar() or 0
-
-    # Tasks
-    tasks_created = Task.query.filter(Task.created_at >= datetime.combine(start_of_month, datetime.min.time())).count()
-    tasks_completed = Task.query.filter(
-        Task.status == 'Done',
-        Task.updated_at >= datetime.combine(start_of_month, datetime.min.time())
-    ).count()
-
-    # Leave requests
-    leave_requests = LeaveRequest.query.filter(
-        LeaveRequest.created_at >= datetime.combine(start_of_month, datetime.min.time())
-    ).count()
-    leave_approved = LeaveRequest.query.filter(
-        LeaveRequest.status == 'Approved',
-        LeaveRequest.approved_at >= datetime.combine(start_of_month, datetime.min.time())
-    ).count()
-
-    # Warnings
-    warnings_issued = Warning.query.filter(
-        Warning.issued_at >= datetime.combine(start_of_month, datetime.min.time())
-    ).count()
-
-    # KPIs
-    total_kpis = KPIScore.query.filter(KPIScore.scored_at >= datetime.combine(start_of_month, datetime.min.time())).count()
-    met_kpis = KPIScore.query.filter(
-        KPIScore.scored_at >= datetime.combine(start_of_month, datetime.min.time()),
-        KPIScore.score == 1
-    ).count()
+    month_start = datetime.combine(start_of_month, datetime.min.time())
+
+    def count_where(column, *criteria):
+        return db.session.query(func.count(column)).filter(*criteria).scalar_subquery()
+
+    # All figures come back from one SELECT of scalar subqueries (one round-trip)
+    stats = db.session.query(
+        # Revenue
+        db.session.query(func.sum(Receipt.amount)).filter(
+            Receipt.date >= start_of_month
+        ).scalar_subquery().label('total_revenue'),
+        # Tasks
+        count_where(Task.id, Task.created_at >= month_start).label('tasks_created'),
+        count_where(Task.id, Task.status == 'Done', Task.updated_at >= month_start).label('tasks_completed'),
+        # Leave requests
+        count_where(LeaveRequest.id, LeaveRequest.created_at >= month_start).label('leave_requests'),
+        count_where(
+            LeaveRequest.id, LeaveRequest.status == 'Approved', LeaveRequest.approved_at >= month_start
+        ).label('leave_approved'),
+        # Warnings
+        count_where(Warning.id, Warning.issued_at >= month_start).label('warnings_issued'),
+        # KPIs
+        count_where(KPIScore.id, KPIScore.scored_at >= month_start).label('total_kpis'),
+        count_where(KPIScore.id, KPIScore.scored_at >= month_start, KPIScore.score == 1).label('met_kpis'),
+    ).one()
+
+    total_revenue = stats.total_revenue or 0
+    tasks_created = stats.tasks_created
+    tasks_completed = stats.tasks_completed
+    leave_requests = stats.leave_requests
+    leave_approved = stats.leave_approved
+    warnings_issued = stats.warnings_issued
+    total_kpis = stats.total_kpis
+    met_kpis = stats.met_kpis
     kpi_rate = (met_kpis / total_kpis * 100) if total_kpis > 0 else 0
 
     return jsonify({
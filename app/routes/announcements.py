@@ -3,10 +3,13 @@ from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, SelectField, DateTimeLocalField, SubmitField
 from wtforms.validators import DataRequired, Length, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import defer, with_expression
 from app import db
 from app.models import Announcement, Notification, User
 from app.utils.decorators import manager_required
 from app.utils.audit import log_audit
+from app.routes.notifications import count_unread_notifications
 from datetime import datetime
 
 bp = Blueprint('announcements', __name__, url_prefix='/announcements')
@@ -35,7 +38,7 @@ def index():
         user_id=current_user.id,
         notification_type='announcement',
         is_read=False
-    ).update({'is_read': True})
+    ).update({'is_read': True}, synchronize_session=False)  # no notifications loaded in this session
     db.session.commit()
 
     # Get active announcements that haven't expired
@@ -62,7 +65,11 @@ def index():
 @manager_required
 def manage():
     """Manage all announcements (for admins/managers)."""
-    announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
+    # The table only shows an excerpt, so fetch the first 51 characters instead of the full text
+    announcements = Announcement.query.options(
+        defer(Announcement.content),
+        with_expression(Announcement.content_preview, func.substr(Announcement.content, 1, 51))
+    ).order_by(Announcement.created_at.desc()).all()
     return render_template('announcements/manage.html', announcements=announcements, now=datetime.utcnow())
 
 
@@ -85,17 +92,19 @@ def create():
         db.session.add(announcement)
         db.session.commit()
 
-        # Create notifications for all active users
-        active_users = User.query.filter_by(status='Active').all()
-        for user in active_users:
-            notification = Notification(
-                user_id=user.id,
-                title=f'New Announcement: {announcement.title}',
-                message=announcement.content[:200] + ('...' if len(announcement.content) > 200 else ''),
-                notification_type='announcement',
-                link=url_for('announcements.index')
-            )
-            db.session.add(notification)
+        # Create notifications for all active users in one bulk INSERT
+        active_user_ids = [user_id for (user_id,) in db.session.query(User.id).filter_by(status='Active')]
+        title = f'New Announcement: {announcement.title}'
+        message = announcement.content[:200] + ('...' if len(announcement.content) > 200 else '')
+        link = url_for('announcements.index')
+        if active_user_ids:
+            db.session.execute(Notification.__table__.insert(), [{
+                'user_id': user_id,
+                'title': title,
+                'message': message,
+                'notification_type': 'announcement',
+                'link': link
+            } for user_id in active_user_ids])
 
         db.session.commit()
 
@@ -181,10 +190,6 @@ def toggle(announcement_id):
 def unread_count():
     """Get count of unread announcement notifications (for badge display)."""
     # Count unread announcement notifications for this user
-    count = Notification.query.filter_by(
-        user_id=current_user.id,
-        notification_type='announcement',
-        is_read=False
-    ).count()
+    count = count_unread_notifications(current_user.id, 'announcement')
 
     return jsonify({'count': count})
@@ -1,18 +1,30 @@
 from flask import Blueprint, render_template, request
 from flask_login import login_required
+from sqlalchemy.orm import selectinload
+from app import cache
 from app.models import AuditLog, User
 from app.utils.decorators import admin_required
 from datetime import date, timedelta
 
 bp = Blueprint('audit', __name__, url_prefix='/audit')
 
+PER_PAGE = 50
+
+
+@cache.memoize(timeout=600)
+def get_unique_actions():
+    """Distinct audit actions for the filter dropdown (cached, the set rarely changes)."""
+    return [a[0] for a in AuditLog.query.with_entities(AuditLog.action).distinct().all()]
+
 
 @bp.route('/')
 @login_required
 @admin_required
 def index():
     """View audit log (Super Admin only)."""
-    page = request.args.get('page', 1, type=int)
+    # Keyset pagination on id (newest first): ?before=<id> pages older, ?after=<id> pages newer
+    before = request.args.get('before', type=int)
+    after = request.args.get('after', type=int)
 
     # Filters
     user_filter = request.args.get('user_id', type=int)
@@ -20,13 +32,20 @@ def index():
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
-    query = AuditLog.query
+    query = AuditLog.query.options(selectinload(AuditLog.user))
 
     if user_filter:
         query = query.filter_by(user_id=user_filter)
 
+    # Get unique actions for filter dropdown
+    unique_actions = get_unique_actions()
+
     if action_filter:
-        query = query.filter(AuditLog.action.like(f'%{action_filter}%'))
+        # Dropdown values are exact actions (indexed equality); anything else falls back to a substring match
+        if action_filter in unique_actions:
+            query = query.filter(AuditLog.action == action_filter)
+        else:
+            query = query.filter(AuditLog.action.like(f'%{action_filter}%'))
 
     if start_date_str:
         start_date = date.fromisoformat(start_date_str)
@@ -36,19 +55,27 @@ def index():
         end_date = date.fromisoformat(end_date_str)
         query = query.filter(AuditLog.created_at <= end_date + timedelta(days=1))
 
-    logs = query.order_by(AuditLog.created_at.desc()).paginate(
-        page=page, per_page=50, error_out=False
-    )
+    # Fetch one extra row to tell whether another page exists, instead of COUNTing the table
+    if after:
+        rows = query.filter(AuditLog.id > after).order_by(AuditLog.id.asc()).limit(PER_PAGE + 1).all()
+        has_newer = len(rows) > PER_PAGE
+        logs = rows[:PER_PAGE][::-1]
+        has_older = True
+    else:
+        if before:
+            query = query.filter(AuditLog.id < before)
+        rows = query.order_by(AuditLog.id.desc()).limit(PER_PAGE + 1).all()
+        has_older = len(rows) > PER_PAGE
+        logs = rows[:PER_PAGE]
+        has_newer = before is not None
 
     # Get users for filter dropdown
-    users = User.query.all()
-
-    # Get unique actions for filter dropdown
-    actions = AuditLog.query.with_entities(AuditLog.action).distinct().all()
-    unique_actions = [a[0] for a in actions]
+    users = User.query.with_entities(User.id, User.full_name).order_by(User.full_name).all()
 
     return render_template('audit/index.html',
                           logs=logs,
+                          has_newer=has_newer,
+                          has_older=has_older,
                           users=users,
                           unique_actions=unique_actions,
                           user_filter=user_filter,
@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, TextAreaField, DateField, SelectField, BooleanField, SubmitField
 from wtforms.validators import DataRequired, Optional
+from sqlalchemy.orm import selectinload
 from app import db
 from app.models import CalendarEvent, User, LeaveRequest, Announcement
 from app.utils.decorators import manager_required
@@ -63,20 +64,22 @@ def index():
     else:
         last_day = date(year, month + 1, 1) - timedelta(days=1)
 
-    # Get calendar events for this month
+    # Get this month's events plus recurring events from any year in one query
     events = CalendarEvent.query.filter(
-        CalendarEvent.event_date >= first_day,
-        CalendarEvent.event_date <= last_day
-    ).all()
-
-    # Also get recurring events (match month and day from any year)
-    recurring_events = CalendarEvent.query.filter(
-        CalendarEvent.is_recurring == True,
-        db.extract('month', CalendarEvent.event_date) == month
+        db.or_(
+            db.and_(
+                CalendarEvent.event_date >= first_day,
+                CalendarEvent.event_date <= last_day
+            ),
+            db.and_(
+                CalendarEvent.is_recurring == True,
+                db.extract('month', CalendarEvent.event_date) == month
+            )
+        )
     ).all()
 
-    # Get approved leave for this month
-    leave_requests = LeaveRequest.query.filter(
+    # Get approved leave for this month (staff loaded in one IN query, not per leave)
+    leave_requests = LeaveRequest.query.options(selectinload(LeaveRequest.staff)).filter(
         LeaveRequest.status == 'Approved',
         LeaveRequest.start_date <= last_day,
         LeaveRequest.end_date >= first_day
@@ -85,12 +88,9 @@ def index():
     # Organize events by date
     events_by_date = {}
 
-    # Add regular events
+    # Add events (each row appears once, so recurring events need no de-duplication)
     for event in events:
-        day = event.event_date.day
-        if day not in events_by_date:
-            events_by_date[day] = []
-        events_by_date[day].append({
+        events_by_date.setdefault(event.event_date.day, []).append({
             'id': event.id,
             'title': event.title,
             'type': event.event_type,
@@ -99,24 +99,6 @@ def index():
             'is_recurring': event.is_recurring
         })
 
-    # Add recurring events (birthdays, awareness days)
-    for event in recurring_events:
-        if event not in events:  # Avoid duplicates
-            day = event.event_date.day
-            if day not in events_by_date:
-                events_by_date[day] = []
-            # Check if this recurring event is already added
-            already_added = any(e['id'] == event.id for e in events_by_date.get(day, []))
-            if not already_added:
-                events_by_date[day].append({
-                    'id': event.id,
-                    'title': event.title,
-                    'type': event.event_type,
-                    'color': COLOR_MAP.get(event.event_type, 'secondary'),
-                    'description': event.description,
-                    'is_recurring': True
-                })
-
     # Add leave to calendar
     leave_by_date = {}
     for leave in leave_requests:
@@ -283,26 +265,33 @@ def upcoming():
 
     # Get recurring events for the next 30 days
     upcoming_events = []
+    seen = set()  # (event id, date) pairs already listed
     for event in events:
         upcoming_events.append({
             'event': event,
             'date': event.event_date,
             'color': COLOR_MAP.get(event.event_type, 'secondary')
         })
+        seen.add((event.id, event.event_date))
 
-    # Check for recurring events
-    recurring = CalendarEvent.query.filter_by(is_recurring=True).all()
+    # Check for recurring events, letting the database narrow them to every month the
+    # window touches (the exact date range is checked below)
+    window_months = {(today + timedelta(days=offset)).month for offset in range((end_date - today).days + 1)}
+    recurring = CalendarEvent.query.filter(
+        CalendarEvent.is_recurring == True,
+        db.extract('month', CalendarEvent.event_date).in_(window_months)
+    ).all()
     for event in recurring:
         # Create this year's occurrence
         try:
             this_year_date = date(today.year, event.event_date.month, event.event_date.day)
-            if today <= this_year_date <= end_date:
-                if not any(e['event'].id == event.id and e['date'] == this_year_date for e in upcoming_events):
-                    upcoming_events.append({
-                        'event': event,
-                        'date': this_year_date,
-                        'color': COLOR_MAP.get(event.event_type, 'secondary')
-                    })
+            if today <= this_year_date <= end_date and (event.id, this_year_date) not in seen:
+                upcoming_events.append({
+                    'event': event,
+                    'date': this_year_date,
+                    'color': COLOR_MAP.get(event.event_type, 'secondary')
+                })
+                seen.add((event.id, this_year_date))
         except ValueError:
             pass  # Invalid date (e.g., Feb 30)
 
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template
 from flask_login import login_required, current_user
+from sqlalchemy import func
+from app import db
 from app.models import Task, LeaveRequest, KPIScore, Warning, SOPDocument, SOPAcknowledgement
 from datetime import date, timedelta
 
@@ -10,40 +12,47 @@ bp = Blueprint('dashboard', __name__)
 @login_required
 def index():
     """Main dashboard - shows role-specific content."""
+    today = date.today()
     context = {
         'user': current_user,
-        'today': date.today()
+        'today': today
     }
 
-    # Get pending tasks for current user
-    my_tasks = Task.query.filter(
+    # Get pending tasks for current user (only the columns the task list shows)
+    my_tasks = Task.query.with_entities(
+        Task.id, Task.title, Task.description, Task.due_date, Task.status
+    ).filter(
         Task.assigned_to == current_user.id,
         Task.status != 'Done'
     ).order_by(Task.due_date).limit(5).all()
     context['my_tasks'] = my_tasks
 
-    # Get overdue tasks count
-    overdue_count = Task.query.filter(
-        Task.assigned_to == current_user.id,
-        Task.status != 'Done',
-        Task.due_date < date.today()
-    ).count()
-    context['overdue_count'] = overdue_count
+    # Badge counts in one round-trip: overdue tasks, pending leave, unacknowledged SOPs, warnings
+    acknowledged_sop_ids = db.session.query(SOPAcknowledgement.sop_id).filter_by(staff_id=current_user.id)
+    counts = db.session.query(
+        db.session.query(func.count(Task.id)).filter(
+            Task.assigned_to == current_user.id,
+            Task.status != 'Done',
+            Task.due_date < today
+        ).scalar_subquery().label('overdue_count'),
+        db.session.query(func.count(LeaveRequest.id)).filter(
+            LeaveRequest.status == 'Pending'
+        ).scalar_subquery().label('pending_leave'),
+        db.session.query(func.count(SOPDocument.id)).filter(
+            ~SOPDocument.id.in_(acknowledged_sop_ids)
+        ).scalar_subquery().label('unacknowledged_sops'),
+        db.session.query(func.count(Warning.id)).filter(
+            Warning.staff_id == current_user.id
+        ).scalar_subquery().label('warning_count'),
+    ).one()
+
+    context['overdue_count'] = counts.overdue_count
 
     # Get pending leave requests (for managers)
     if current_user.role in ['Practice Manager', 'Super Admin']:
-        pending_leave = LeaveRequest.query.filter_by(status='Pending').count()
-        context['pending_leave'] = pending_leave
-
-    # Get unacknowledged SOPs
-    all_sops = SOPDocument.query.all()
-    acknowledged_sop_ids = [ack.sop_id for ack in
-                            SOPAcknowledgement.query.filter_by(staff_id=current_user.id).all()]
-    unacknowledged_sops = [sop for sop in all_sops if sop.id not in acknowledged_sop_ids]
-    context['unacknowledged_sops'] = len(unacknowledged_sops)
-
-    # Get warning count for current user
-    warning_count = Warning.query.filter_by(staff_id=current_user.id).count()
-    context['warning_count'] = warning_count
+        context['pending_leave'] = counts.pending_leave
+
+    context['unacknowledged_sops'] = counts.unacknowledged_sops
+    context['warning_count'] = counts.warning_count
 
     return render_template('dashboard.html', **context)
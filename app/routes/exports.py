@@ -1,130 +1,370 @@
 """Export routes for PDF and Excel downloads."""
-from flask import Blueprint, send_file, request, flash, redirect, url_for
+from flask import Blueprint, Response, send_file, request, flash, redirect, url_for, stream_with_context
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
-from app import db
-from app.models import Receipt, User, KPIScore, PerformanceEvent, Task, Warning, LeaveRequest
+from functools import wraps
+from hashlib import sha1
+from uuid import uuid4
+import os
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import aliased
+from flask_caching.backends import NullCache, SimpleCache
+from app import db, cache
+from app.models import Receipt, User, KPIScore, PerformanceEvent, Task, Warning, LeaveRequest, RoleKPI
 from app.utils.decorators import manager_required
+from app.routes.kpi import MONTH_NAMES
 from app.utils.exports import (
-    create_excel_report, create_pdf_report,
+    create_excel_report, create_pdf_report, generate_csv, pdf_styles, report_buffer,
     format_currency, format_date, format_datetime
 )
 
 bp = Blueprint('exports', __name__, url_prefix='/exports')
 
+# Rows fetched per round-trip when streaming export queries (server-side cursor on PostgreSQL)
+EXPORT_BATCH_SIZE = 1000
+
+# Largest Excel/PDF export we build in a request; bigger ones are pointed at CSV or a narrower range
+MAX_EXPORT_ROWS = 50_000
+
+# Columns the export rows print; rows are read as plain tuples rather than ORM objects
+RECEIPT_EXPORT_COLUMNS = (
+    Receipt.receipt_number, Receipt.date, Receipt.amount,
+    Receipt.payment_method, Receipt.description
+)
+KPI_EXPORT_COLUMNS = (KPIScore.month, KPIScore.year, KPIScore.score, KPIScore.notes)
+PERFORMANCE_EXPORT_COLUMNS = (
+    PerformanceEvent.event_type, PerformanceEvent.event_description, PerformanceEvent.created_at
+)
+
+# Generated files up to this size are cached for repeat downloads
+EXPORT_CACHE_MAX_SIZE = 2 * 1024 * 1024
+EXPORT_VERSION_KEY = 'exports:version'
+
+
+def exports_version():
+    """Token that changes whenever data shown in an export is written."""
+    version = cache.get(EXPORT_VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        cache.set(EXPORT_VERSION_KEY, version, timeout=0)
+    return version
+
+
+def export_cache_is_shared():
+    """
+    True when the cache backend is shared between processes (e.g. RedisCache).
+    With the per-process SimpleCache a write only bumps the version in its own
+    process, so other workers would keep serving the old file.
+    """
+    return not isinstance(cache.cache, (SimpleCache, NullCache))
+
+
+def clear_exports_cache(*args):
+    """Retire every cached export (used as a SQLAlchemy mapper event listener)."""
+    cache.set(EXPORT_VERSION_KEY, uuid4().hex, timeout=0)
+
+
+# Any write to data the exports show makes previously cached files unreachable
+for model in (Receipt, User, KPIScore, RoleKPI, PerformanceEvent, Task, Warning, LeaveRequest):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, clear_exports_cache)
+
+
+def cached_export(view):
+    """
+    Cache a generated export per endpoint, filters and user, and answer
+    repeat downloads with the stored file (or 304 when the ETag matches).
+    Only applies with a shared cache backend; otherwise the view's streamed
+    response is returned untouched.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        # A per-process cache would miss other workers' version bumps
+        if not export_cache_is_shared():
+            return view(*args, **kwargs)
+
+        # The key includes the exports version, so it doubles as the ETag
+        key = sha1(repr((
+            request.endpoint, sorted(kwargs.items()), sorted(request.args.items(multi=True)),
+            current_user.id, exports_version()
+        )).encode()).hexdigest()
+        if key in request.if_none_match:
+            return Response(status=304, headers={'ETag': f'"{key}"'})
+
+        cached = cache.get(f'export:{key}')
+        if cached is not None:
+            data, headers = cached
+            response = Response(data, headers=headers)
+        else:
+            response = view(*args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.set_etag(key)
+            # Only buffer files whose size is known to be small enough to store
+            if response.content_length is not None and response.content_length <= EXPORT_CACHE_MAX_SIZE:
+                response.direct_passthrough = False
+                cache.set(f'export:{key}', (response.get_data(), list(response.headers)))
+        return response
+    return wrapped
+
+
+def csv_response(headers, rows, filename_prefix):
+    """Stream rows to the client as a CSV download while they are still being fetched."""
+    filename = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    return Response(
+        stream_with_context(generate_csv(headers, rows)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+def send_report(buffer, mimetype, filename):
+    """Send a finished report buffer as a download, with its Content-Length set."""
+    buffer.seek(0, os.SEEK_END)
+    size = buffer.tell()
+    buffer.seek(0)
+    response = send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=filename)
+    response.content_length = size
+    return response
+
+
+def export_too_large(query, fallback_endpoint):
+    """
+    Return a redirect with an explanation if a filtered export query has more
+    than MAX_EXPORT_ROWS rows, otherwise None. Counting stops at the limit.
+    """
+    if query.limit(MAX_EXPORT_ROWS + 1).count() <= MAX_EXPORT_ROWS:
+        return None
+    flash(f'This export has more than {MAX_EXPORT_ROWS:,} rows. '
+          'Narrow the date range or use the CSV export.', 'warning')
+    return redirect(request.referrer or url_for(fallback_endpoint))
+
+
+def with_user_name(query, user_id_column, label):
+    """
+    Outer-join the user referenced by user_id_column and add their name to the
+    selected columns as label, so each row arrives with the name as a string.
+    """
+    user = aliased(User)
+    return query.outerjoin(user, user.id == user_id_column).add_columns(user.full_name.label(label))
+
+
+def with_kpi_name(query):
+    """Outer-join the scored KPI and add its name to the selected columns as kpi_name."""
+    return query.outerjoin(RoleKPI, RoleKPI.id == KPIScore.kpi_id).add_columns(RoleKPI.name.label('kpi_name'))
+
+
+def payment_method_totals(query):
+    """Sum a filtered Receipt query per payment method in SQL, as {method: float total}."""
+    return {
+        method: float(amount or 0)
+        for method, amount in query.with_entities(
+            Receipt.payment_method, func.sum(Receipt.amount)
+        ).group_by(Receipt.payment_method)
+    }
+
 
 # ============================================
-# Receipt Exports
+# Export Queries (shared by the Excel, PDF and CSV routes)
 # ============================================
 
-@bp.route('/receipts/excel')
-@login_required
-def receipts_excel():
-    """Export receipts to Excel."""
-    # Get date filters
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
+def receipts_query(args, user):
+    """Receipts matching the export filters; staff can only export their own receipts."""
     query = Receipt.query
 
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
     if start_date:
-        query = query.filter(Receipt.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
+        query = query.filter(Receipt.date >= date.fromisoformat(start_date))
     if end_date:
-        query = query.filter(Receipt.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+        query = query.filter(Receipt.date <= date.fromisoformat(end_date))
 
-    # Staff can only export their own receipts
-    if current_user.role not in ['Practice Manager', 'Super Admin']:
-        query = query.filter_by(created_by=current_user.id)
+    if user.role not in ['Practice Manager', 'Super Admin']:
+        query = query.filter_by(created_by=user.id)
 
-    receipts = query.order_by(Receipt.date.desc()).all()
+    return query
 
-    headers = ['Receipt #', 'Date', 'Amount', 'Payment Method', 'Description', 'Created By']
-    data = []
-    for r in receipts:
-        creator = User.query.get(r.created_by)
-        data.append([
-            r.receipt_number,
-            format_date(r.date),
-            format_currency(r.amount),
-            r.payment_method,
-            r.description or '-',
-            creator.full_name if creator else '-'
-        ])
 
-    # Calculate totals
-    total = sum(float(r.amount) for r in receipts)
-    cash_total = sum(float(r.amount) for r in receipts if r.payment_method == 'Cash')
-    card_total = sum(float(r.amount) for r in receipts if r.payment_method == 'Card')
-    eft_total = sum(float(r.amount) for r in receipts if r.payment_method == 'EFT')
+def receipt_rows(query, with_creator=True):
+    """Newest-first export rows for a filtered Receipt query, streamed in batches."""
+    query = query.with_entities(*RECEIPT_EXPORT_COLUMNS)
+    if with_creator:
+        query = with_user_name(query, Receipt.created_by, 'creator_name')
+    return query.order_by(Receipt.date.desc()).yield_per(EXPORT_BATCH_SIZE)
 
-    data.append(['', '', '', '', '', ''])
-    data.append(['TOTALS', '', format_currency(total), '', '', ''])
-    data.append(['Cash', '', format_currency(cash_total), '', '', ''])
-    data.append(['Card', '', format_currency(card_total), '', '', ''])
-    data.append(['EFT', '', format_currency(eft_total), '', '', ''])
 
-    title = 'Receipts Report'
+def kpi_scores_query(args):
+    """KPI scores matching the export filters (staff member and month range)."""
+    query = KPIScore.query
+
+    staff_id = args.get('staff_id', type=int)
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    if staff_id:
+        query = query.filter_by(staff_id=staff_id)
+    if start_date:
+        start = date.fromisoformat(start_date)
+        query = query.filter(KPIScore.period >= KPIScore.period_of(start.month, start.year))
+    if end_date:
+        end = date.fromisoformat(end_date)
+        query = query.filter(KPIScore.period <= KPIScore.period_of(end.month, end.year))
+
+    return query
+
+
+def kpi_score_rows(query, with_scorer=True):
+    """Export rows for a filtered KPIScore query with staff, KPI and (optionally) scorer names."""
+    query = with_user_name(query.with_entities(*KPI_EXPORT_COLUMNS), KPIScore.staff_id, 'staff_name')
+    if with_scorer:
+        query = with_user_name(query, KPIScore.scored_by, 'scorer_name')
+    return with_kpi_name(query).order_by(
+        KPIScore.period.desc(), KPIScore.staff_id
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+
+def performance_events_query(args):
+    """Performance events matching the export filters (staff member)."""
+    query = PerformanceEvent.query
+
+    staff_id = args.get('staff_id', type=int)
+    if staff_id:
+        query = query.filter_by(staff_id=staff_id)
+
+    return query
+
+
+def performance_event_rows(query, with_creator=True, limit=None):
+    """Newest-first export rows for a filtered PerformanceEvent query, optionally capped at limit."""
+    query = with_user_name(
+        query.with_entities(*PERFORMANCE_EXPORT_COLUMNS), PerformanceEvent.staff_id, 'staff_name'
+    )
+    if with_creator:
+        query = with_user_name(query, PerformanceEvent.created_by, 'creator_name')
+    return query.order_by(PerformanceEvent.created_at.desc()).limit(limit).yield_per(EXPORT_BATCH_SIZE)
+
+
+def report_title(title, args):
+    """Append the requested date range to a report title when both ends are given."""
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
     if start_date and end_date:
         title += f' ({start_date} to {end_date})'
+    return title
+
 
-    buffer = create_excel_report(title, headers, data, 'receipts')
+def performance_title(title, args, staff_title):
+    """Use staff_title (formatted with the staff member's name) when one staff member is exported."""
+    staff_id = args.get('staff_id', type=int)
+    if staff_id:
+        staff = db.session.get(User, staff_id)
+        if staff:
+            return staff_title.format(name=staff.full_name)
+    return title
+
+
+# ============================================
+# Receipt Exports
+# ============================================
+
+@bp.route('/receipts/excel')
+@login_required
+@cached_export
+def receipts_excel():
+    """Export receipts to Excel."""
+    query = receipts_query(request.args, current_user)
+
+    too_large = export_too_large(query, 'receipts.index')
+    if too_large:
+        return too_large
+
+    # Totals per payment method come from one GROUP BY over the same filters
+    method_totals = payment_method_totals(query)
+    total = sum(method_totals.values())
+
+    # Stream receipts in batches straight into the workbook
+    receipts = receipt_rows(query)
+
+    headers = ['Receipt #', 'Date', 'Amount', 'Payment Method', 'Description', 'Created By']
+
+    def rows():
+        for r in receipts:
+            yield [
+                r.receipt_number,
+                format_date(r.date),
+                format_currency(r.amount),
+                r.payment_method,
+                r.description or '-',
+                r.creator_name or '-'
+            ]
+
+        # Totals rows follow once every receipt has been written
+        yield ['', '', '', '', '', '']
+        yield ['TOTALS', '', format_currency(total), '', '', '']
+        yield ['Cash', '', format_currency(method_totals.get('Cash')), '', '', '']
+        yield ['Card', '', format_currency(method_totals.get('Card')), '', '', '']
+        yield ['EFT', '', format_currency(method_totals.get('EFT')), '', '', '']
+
+    title = report_title('Receipts Report', request.args)
+    buffer = create_excel_report(title, headers, rows(), 'receipts')
 
     filename = f"receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    return send_file(
-        buffer,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_report(buffer, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', filename)
 
 
 @bp.route('/receipts/pdf')
 @login_required
+@cached_export
 def receipts_pdf():
     """Export receipts to PDF."""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    query = receipts_query(request.args, current_user)
 
-    query = Receipt.query
-
-    if start_date:
-        query = query.filter(Receipt.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(Receipt.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-    if current_user.role not in ['Practice Manager', 'Super Admin']:
-        query = query.filter_by(created_by=current_user.id)
-
-    receipts = query.order_by(Receipt.date.desc()).all()
+    too_large = export_too_large(query, 'receipts.index')
+    if too_large:
+        return too_large
 
     headers = ['Receipt #', 'Date', 'Amount', 'Method', 'Description']
     data = []
-    for r in receipts:
+    total = 0.0
+    for r in receipt_rows(query, with_creator=False):
+        amount = float(r.amount)
         data.append([
             r.receipt_number,
             format_date(r.date),
-            format_currency(r.amount),
+            format_currency(amount),
             r.payment_method,
             (r.description or '-')[:30]
         ])
+        total += amount
 
-    total = sum(float(r.amount) for r in receipts)
     data.append(['', '', '', '', ''])
     data.append(['TOTAL', '', format_currency(total), '', ''])
 
-    title = 'Receipts Report'
-    if start_date and end_date:
-        title += f' ({start_date} to {end_date})'
-
+    title = report_title('Receipts Report', request.args)
     buffer = create_pdf_report(title, headers, data, 'receipts', 'landscape')
 
     filename = f"receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return send_report(buffer, 'application/pdf', filename)
+
+
+@bp.route('/receipts/csv')
+@login_required
+def receipts_csv():
+    """Export receipts to CSV (raw values, streamed)."""
+    receipts = receipt_rows(receipts_query(request.args, current_user))
+
+    headers = ['Receipt #', 'Date', 'Amount', 'Payment Method', 'Description', 'Created By']
+    rows = (
+        [
+            r.receipt_number,
+            r.date.isoformat(),
+            r.amount,
+            r.payment_method,
+            r.description or '',
+            r.creator_name or ''
+        ]
+        for r in receipts
     )
+    return csv_response(headers, rows, 'receipts')
 
 
 # ============================================
@@ -134,77 +374,54 @@ def receipts_pdf():
 @bp.route('/kpi/excel')
 @login_required
 @manager_required
+@cached_export
 def kpi_excel():
     """Export KPI scores to Excel."""
-    staff_id = request.args.get('staff_id', type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    query = KPIScore.query
-
-    if staff_id:
-        query = query.filter_by(staff_id=staff_id)
-    if start_date:
-        query = query.filter(KPIScore.week_start_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(KPIScore.week_start_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-
-    scores = query.order_by(KPIScore.week_start_date.desc(), KPIScore.staff_id).all()
-
-    headers = ['Staff Member', 'Week Starting', 'KPI Category', 'Score', 'Scored By', 'Notes']
-    data = []
-    for s in scores:
-        staff = User.query.get(s.staff_id)
-        scorer = User.query.get(s.scored_by)
-        data.append([
-            staff.full_name if staff else '-',
-            format_date(s.week_start_date),
-            s.kpi_category,
+    query = kpi_scores_query(request.args)
+
+    too_large = export_too_large(query, 'kpi.index')
+    if too_large:
+        return too_large
+
+    headers = ['Staff Member', 'Month', 'KPI', 'Score', 'Scored By', 'Notes']
+    rows = (
+        [
+            s.staff_name or '-',
+            f'{MONTH_NAMES[s.month]} {s.year}',
+            s.kpi_name or '-',
             'Met' if s.score == 1 else 'Not Met',
-            scorer.full_name if scorer else '-',
+            s.scorer_name or '-',
             s.notes or '-'
-        ])
+        ]
+        for s in kpi_score_rows(query)
+    )
 
     title = 'KPI Scores Report'
-    buffer = create_excel_report(title, headers, data, 'kpi_scores')
+    buffer = create_excel_report(title, headers, rows, 'kpi_scores')
 
     filename = f"kpi_scores_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    return send_file(
-        buffer,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_report(buffer, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', filename)
 
 
 @bp.route('/kpi/pdf')
 @login_required
 @manager_required
+@cached_export
 def kpi_pdf():
     """Export KPI scores to PDF."""
-    staff_id = request.args.get('staff_id', type=int)
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-
-    query = KPIScore.query
-
-    if staff_id:
-        query = query.filter_by(staff_id=staff_id)
-    if start_date:
-        query = query.filter(KPIScore.week_start_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(KPIScore.week_start_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    query = kpi_scores_query(request.args)
 
-    scores = query.order_by(KPIScore.week_start_date.desc(), KPIScore.staff_id).all()
+    too_large = export_too_large(query, 'kpi.index')
+    if too_large:
+        return too_large
 
-    headers = ['Staff', 'Week', 'Category', 'Score', 'Notes']
+    headers = ['Staff', 'Month', 'KPI', 'Score', 'Notes']
     data = []
-    for s in scores:
-        staff = User.query.get(s.staff_id)
+    for s in kpi_score_rows(query, with_scorer=False):
         data.append([
-            staff.full_name if staff else '-',
-            format_date(s.week_start_date),
-            s.kpi_category[:20],
+            s.staff_name or '-',
+            f'{MONTH_NAMES[s.month][:3]} {s.year}',
+            (s.kpi_name or '-')[:20],
             'Met' if s.score == 1 else 'Not Met',
             (s.notes or '-')[:25]
         ])
@@ -213,12 +430,30 @@ def kpi_pdf():
     buffer = create_pdf_report(title, headers, data, 'kpi_scores', 'landscape')
 
     filename = f"kpi_scores_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return send_report(buffer, 'application/pdf', filename)
+
+
+@bp.route('/kpi/csv')
+@login_required
+@manager_required
+def kpi_csv():
+    """Export KPI scores to CSV (raw values, streamed)."""
+    scores = kpi_score_rows(kpi_scores_query(request.args))
+
+    headers = ['Staff Member', 'Year', 'Month', 'KPI', 'Score', 'Scored By', 'Notes']
+    rows = (
+        [
+            s.staff_name or '',
+            s.year,
+            s.month,
+            s.kpi_name or '',
+            s.score,
+            s.scorer_name or '',
+            s.notes or ''
+        ]
+        for s in scores
     )
+    return csv_response(headers, rows, 'kpi_scores')
 
 
 # ============================================
@@ -228,87 +463,73 @@ def kpi_pdf():
 @bp.route('/performance/excel')
 @login_required
 @manager_required
+@cached_export
 def performance_excel():
     """Export performance history to Excel."""
-    staff_id = request.args.get('staff_id', type=int)
-
-    query = PerformanceEvent.query
-
-    if staff_id:
-        query = query.filter_by(staff_id=staff_id)
-
-    events = query.order_by(PerformanceEvent.created_at.desc()).limit(500).all()
+    events = performance_event_rows(performance_events_query(request.args), limit=500)
 
     headers = ['Staff Member', 'Event Type', 'Description', 'Date', 'Recorded By']
     data = []
     for e in events:
-        staff = User.query.get(e.staff_id)
-        creator = User.query.get(e.created_by)
         data.append([
-            staff.full_name if staff else '-',
+            e.staff_name or '-',
             e.event_type,
             e.event_description[:50] if e.event_description else '-',
             format_datetime(e.created_at),
-            creator.full_name if creator else '-'
+            e.creator_name or '-'
         ])
 
-    title = 'Performance History Report'
-    if staff_id:
-        staff = User.query.get(staff_id)
-        if staff:
-            title = f'Performance History - {staff.full_name}'
-
+    title = performance_title('Performance History Report', request.args, 'Performance History - {name}')
     buffer = create_excel_report(title, headers, data, 'performance')
 
     filename = f"performance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    return send_file(
-        buffer,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_report(buffer, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', filename)
 
 
 @bp.route('/performance/pdf')
 @login_required
 @manager_required
+@cached_export
 def performance_pdf():
     """Export performance history to PDF."""
-    staff_id = request.args.get('staff_id', type=int)
-
-    query = PerformanceEvent.query
-
-    if staff_id:
-        query = query.filter_by(staff_id=staff_id)
-
-    events = query.order_by(PerformanceEvent.created_at.desc()).limit(100).all()
+    events = performance_event_rows(performance_events_query(request.args), with_creator=False, limit=100)
 
     headers = ['Staff', 'Type', 'Description', 'Date']
     data = []
     for e in events:
-        staff = User.query.get(e.staff_id)
         data.append([
-            staff.full_name if staff else '-',
+            e.staff_name or '-',
             e.event_type,
             (e.event_description or '-')[:40],
             format_datetime(e.created_at)
         ])
 
-    title = 'Performance History'
-    if staff_id:
-        staff = User.query.get(staff_id)
-        if staff:
-            title = f'Performance - {staff.full_name}'
-
+    title = performance_title('Performance History', request.args, 'Performance - {name}')
     buffer = create_pdf_report(title, headers, data, 'performance', 'landscape')
 
     filename = f"performance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return send_report(buffer, 'application/pdf', filename)
+
+
+@bp.route('/performance/csv')
+@login_required
+@manager_required
+def performance_csv():
+    """Export performance history to CSV (raw values, streamed, no row limit)."""
+    events = performance_event_rows(performance_events_query(request.args))
+
+    headers = ['Staff Member', 'Event Type', 'Description', 'Date', 'Recorded By']
+    rows = (
+        [
+            e.staff_name or '',
+            e.event_type,
+            e.event_description or '',
+            e.created_at.isoformat(sep=' ', timespec='seconds') if e.created_at else '',
+            e.creator_name or ''
+        ]
+        for e in events
     )
+    return csv_response(headers, rows, 'performance')
 
 
 # ============================================
@@ -318,41 +539,43 @@ def performance_pdf():
 @bp.route('/staff/<int:staff_id>/report/pdf')
 @login_required
 @manager_required
+@cached_export
 def staff_report_pdf(staff_id):
     """Generate a comprehensive staff report PDF."""
     staff = User.query.get_or_404(staff_id)
 
     # Gather all data for this staff member
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.pagesizes import A4
     from reportlab.lib import colors
     from reportlab.lib.units import mm
-    from io import BytesIO
 
-    buffer = BytesIO()
+    buffer = report_buffer()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=20*mm, bottomMargin=20*mm)
     elements = []
-    styles = getSampleStyleSheet()
+    styles = pdf_styles()
 
     # Title
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=20, textColor=colors.HexColor('#16a34a'))
-    elements.append(Paragraph(f"Staff Report: {staff.full_name}", title_style))
+    elements.append(Paragraph(f"Staff Report: {staff.full_name}", styles['StaffReportTitle']))
     elements.append(Paragraph(f"Role: {staff.role} | Status: {staff.status}", styles['Normal']))
     elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %b %Y %H:%M')}", styles['Italic']))
     elements.append(Spacer(1, 20))
 
     # KPI Summary
     elements.append(Paragraph("KPI Performance (Last 30 Days)", styles['Heading2']))
-    kpi_scores = KPIScore.query.filter(
+    # Counted in SQL over the months covering the last 30 days (scores are recorded per month)
+    cutoff = date.today() - timedelta(days=30)
+    total_scores, met_scores = db.session.query(
+        func.count(KPIScore.id),
+        func.sum(case((KPIScore.score == 1, 1), else_=0))
+    ).filter(
         KPIScore.staff_id == staff_id,
-        KPIScore.week_start_date >= date.today() - timedelta(days=30)
-    ).all()
+        KPIScore.period >= KPIScore.period_of(cutoff.month, cutoff.year)
+    ).one()
 
-    if kpi_scores:
-        total_scores = len(kpi_scores)
-        met_scores = sum(1 for s in kpi_scores if s.score == 1)
-        percentage = (met_scores / total_scores * 100) if total_scores > 0 else 0
+    if total_scores:
+        met_scores = met_scores or 0
+        percentage = met_scores / total_scores * 100
         elements.append(Paragraph(f"Total KPIs: {total_scores} | Met: {met_scores} | Score: {percentage:.0f}%", styles['Normal']))
     else:
         elements.append(Paragraph("No KPI scores recorded in the last 30 days.", styles['Normal']))
@@ -360,11 +583,13 @@ def staff_report_pdf(staff_id):
 
     # Task Summary
     elements.append(Paragraph("Task Summary", styles['Heading2']))
-    tasks = Task.query.filter_by(assigned_to=staff_id).all()
-    completed = sum(1 for t in tasks if t.status == 'Done')
-    in_progress = sum(1 for t in tasks if t.status == 'In Progress')
-    todo = sum(1 for t in tasks if t.status == 'To Do')
-    elements.append(Paragraph(f"Total: {len(tasks)} | Completed: {completed} | In Progress: {in_progress} | To Do: {todo}", styles['Normal']))
+    task_counts = dict(
+        db.session.query(Task.status, func.count(Task.id)).filter_by(assigned_to=staff_id).group_by(Task.status).all()
+    )
+    completed = task_counts.get('Done', 0)
+    in_progress = task_counts.get('In Progress', 0)
+    todo = task_counts.get('To Do', 0)
+    elements.append(Paragraph(f"Total: {sum(task_counts.values())} | Completed: {completed} | In Progress: {in_progress} | To Do: {todo}", styles['Normal']))
     elements.append(Spacer(1, 15))
 
     # Warnings
@@ -416,12 +641,7 @@ def staff_report_pdf(staff_id):
     buffer.seek(0)
 
     filename = f"staff_report_{staff.full_name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_report(buffer, 'application/pdf', filename)
 
 
 # ============================================
@@ -430,31 +650,45 @@ def staff_report_pdf(staff_id):
 
 @bp.route('/daily-cash/pdf')
 @login_required
+@cached_export
 def daily_cash_pdf():
     """Export daily cash summary to PDF."""
     report_date = request.args.get('date')
     if report_date:
-        report_date = datetime.strptime(report_date, '%Y-%m-%d').date()
+        report_date = date.fromisoformat(report_date)
     else:
         report_date = date.today()
 
-    receipts = Receipt.query.filter_by(date=report_date).all()
+    query = Receipt.query.filter_by(date=report_date)
 
-    cash_total = sum(float(r.amount) for r in receipts if r.payment_method == 'Cash')
-    card_total = sum(float(r.amount) for r in receipts if r.payment_method == 'Card')
-    eft_total = sum(float(r.amount) for r in receipts if r.payment_method == 'EFT')
+    too_large = export_too_large(query, 'receipts.daily_summary')
+    if too_large:
+        return too_large
+
+    # The day's rows come from a plain Core SELECT with creator names joined in (no ORM layer)
+    receipts = db.session.execute(
+        select(*RECEIPT_EXPORT_COLUMNS, User.full_name.label('creator_name'))
+        .outerjoin(User, User.id == Receipt.created_by)
+        .where(Receipt.date == report_date)
+        .order_by(Receipt.receipt_number)
+    )
+
+    # Totals per payment method come from one GROUP BY for the day
+    method_totals = payment_method_totals(query)
+    cash_total = method_totals.get('Cash', 0.0)
+    card_total = method_totals.get('Card', 0.0)
+    eft_total = method_totals.get('EFT', 0.0)
     grand_total = cash_total + card_total + eft_total
 
     headers = ['Receipt #', 'Amount', 'Method', 'Description', 'Created By']
     data = []
     for r in receipts:
-        creator = User.query.get(r.created_by)
         data.append([
             r.receipt_number,
             format_currency(r.amount),
             r.payment_method,
             (r.description or '-')[:25],
-            creator.full_name if creator else '-'
+            r.creator_name or '-'
         ])
 
     data.append(['', '', '', '', ''])
@@ -468,9 +702,4 @@ def daily_cash_pdf():
     buffer = create_pdf_report(title, headers, data, 'daily_cash')
 
     filename = f"daily_cash_{report_date.strftime('%Y%m%d')}.pdf"
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
-    )
+    return send_report(buffer, 'application/pdf', filename)
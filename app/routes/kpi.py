@@ -1,11 +1,14 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app import db
+from app import db, cache
 from app.models import KPIScore, KPICategory, RoleKPI, User, PerformanceEvent, Warning, Notification
 from app.utils.decorators import manager_required
 from app.utils.audit import log_audit
+from app.routes.analytics import clear_analytics_cache
 from datetime import date, datetime
-from sqlalchemy import func
+from sqlalchemy import case, event, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import load_only
 import calendar
 
 bp = Blueprint('kpi', __name__, url_prefix='/kpi')
@@ -17,68 +20,155 @@ KPI_ROLES = ['Dental Assistant', 'Dentist', 'Receptionist', 'Cleaner']
 # Super Admin (practice owner) is excluded from KPIs
 SCORABLE_ROLES = ['Dental Assistant', 'Dentist', 'Receptionist', 'Cleaner', 'Practice Manager']
 
+# Staff lists on the KPI pages only show these columns
+STAFF_LIST_COLUMNS = load_only(User.id, User.full_name, User.role)
+
 def get_kpi_role(user_role):
     """Map user role to KPI role. Practice Manager uses Dentist KPIs."""
     if user_role == 'Practice Manager':
         return 'Dentist'
     return user_role
 
+# INSERT ... ON CONFLICT per database dialect (both expose the same upsert API)
+UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
 MONTH_NAMES = [
     '', 'January', 'February', 'March', 'April', 'May', 'June',
     'July', 'August', 'September', 'October', 'November', 'December'
 ]
 
 
+@cache.memoize(timeout=600)
+def get_role_kpi_ids(role):
+    """Ids of a role's active KPIs (cached; cleared whenever a KPI is written)."""
+    return [
+        kpi_id for (kpi_id,) in
+        RoleKPI.query.with_entities(RoleKPI.id).filter_by(role=role, is_active=True).order_by(RoleKPI.id)
+    ]
+
+
+@cache.memoize(timeout=600)
 def get_kpis_for_role(role):
-    """Get all KPIs organized by category for a specific role."""
+    """Get all KPIs organized by category for a specific role (cached; cleared whenever a KPI or category is written)."""
     categories = KPICategory.query.filter_by(role=role, is_active=True).order_by(KPICategory.name).all()
+
+    # Every category's KPIs come from one query instead of one per category
+    kpis_by_category = {cat.id: [] for cat in categories}
+    for kpi in RoleKPI.query.filter(
+        RoleKPI.category_id.in_(kpis_by_category),
+        RoleKPI.is_active == True
+    ).order_by(RoleKPI.id):
+        kpis_by_category[kpi.category_id].append(kpi)
+
     result = []
     for cat in categories:
-        kpis = RoleKPI.query.filter_by(category_id=cat.id, is_active=True).all()
         result.append({
             'category': cat,
-            'kpis': kpis
+            'kpis': kpis_by_category[cat.id]
         })
     return result
 
 
-def calculate_monthly_score(staff_id, month, year):
-    """Calculate the overall KPI score for a staff member for a given month."""
-    staff = User.query.get(staff_id)
-    if not staff or staff.role not in SCORABLE_ROLES:
-        return None
+def clear_role_kpi_cache(*args):
+    """Drop the cached role KPI data (used as a SQLAlchemy mapper event listener)."""
+    cache.delete_memoized(get_role_kpi_ids)
+    cache.delete_memoized(get_kpis_for_role)
 
-    # Get all KPIs for this staff's role (Practice Manager uses Dentist KPIs)
-    kpi_role = get_kpi_role(staff.role)
-    role_kpis = RoleKPI.query.filter_by(role=kpi_role, is_active=True).all()
-    if not role_kpis:
-        return None
 
-    kpi_ids = [k.id for k in role_kpis]
+for model in (KPICategory, RoleKPI):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, clear_role_kpi_cache)
 
-    # Get scores for this month
-    scores = KPIScore.query.filter(
-        KPIScore.staff_id == staff_id,
-        KPIScore.kpi_id.in_(kpi_ids),
-        KPIScore.month == month,
-        KPIScore.year == year
-    ).all()
 
-    if not scores:
-        return None
+def calculate_monthly_score(staff, month, year):
+    """Calculate the overall KPI score for a staff member for a given month."""
+    return calculate_scores_by_month(staff, [(month, year)]).get((month, year))
+
 
-    met = sum(1 for s in scores if s.score == 1)
-    total = len(scores)
+def score_summary(met, total, total_kpis):
+    """Summary dict for a month's KPI scores (met/total scored, out of total_kpis for the role)."""
     percentage = (met / total * 100) if total > 0 else 0
 
     return {
         'met': met,
         'total': total,
         'percentage': percentage,
-        'total_kpis': len(role_kpis),
-        'scored': total == len(role_kpis)  # True if all KPIs have been scored
+        'total_kpis': total_kpis,
+        'scored': total == total_kpis  # True if all KPIs have been scored
+    }
+
+
+def calculate_scores_by_month(staff, periods):
+    """
+    calculate_monthly_score() for one staff member over several (month, year)
+    periods, in one grouped query. Returns {(month, year): score summary} for
+    the periods that have scores.
+    """
+    if staff.role not in SCORABLE_ROLES:
+        return {}
+
+    kpi_ids = get_role_kpi_ids(get_kpi_role(staff.role))
+    if not kpi_ids:
+        return {}
+
+    rows = db.session.query(
+        KPIScore.period,
+        func.count(KPIScore.id).label('total'),
+        func.sum(case((KPIScore.score == 1, 1), else_=0)).label('met')
+    ).filter(
+        KPIScore.staff_id == staff.id,
+        KPIScore.kpi_id.in_(kpi_ids),
+        KPIScore.period.in_([KPIScore.period_of(month, year) for month, year in periods])
+    ).group_by(KPIScore.period)
+
+    results = {}
+    for row in rows:
+        year, month = divmod(row.period, 100)
+        results[(month, year)] = score_summary(row.met or 0, row.total, len(kpi_ids))
+    return results
+
+
+def calculate_monthly_scores_bulk(staff_list, month, year):
+    """
+    calculate_monthly_score() for several staff members at once: active KPI
+    counts come from the cached role KPI ids, scores from one grouped query.
+    Returns {staff_id: score summary} for the members that have scores.
+    """
+    staff_list = [member for member in staff_list if member.role in SCORABLE_ROLES]
+    if not staff_list:
+        return {}
+
+    kpi_counts = {
+        kpi_role: len(get_role_kpi_ids(kpi_role))
+        for kpi_role in {get_kpi_role(member.role) for member in staff_list}
+    }
+
+    # Grouped by KPI role too, so each member only counts scores for their own role's active KPIs
+    score_totals = {
+        (row.staff_id, row.role): (row.total, row.met or 0)
+        for row in db.session.query(
+            KPIScore.staff_id,
+            RoleKPI.role,
+            func.count(KPIScore.id).label('total'),
+            func.sum(case((KPIScore.score == 1, 1), else_=0)).label('met')
+        ).join(RoleKPI, RoleKPI.id == KPIScore.kpi_id).filter(
+            KPIScore.staff_id.in_([member.id for member in staff_list]),
+            KPIScore.period == KPIScore.period_of(month, year),
+            RoleKPI.is_active == True
+        ).group_by(KPIScore.staff_id, RoleKPI.role)
     }
 
+    results = {}
+    for member in staff_list:
+        kpi_role = get_kpi_role(member.role)
+        total, met = score_totals.get((member.id, kpi_role), (0, 0))
+        if kpi_counts.get(kpi_role) and total:
+            results[member.id] = score_summary(met, total, kpi_counts[kpi_role])
+    return results
+
 
 @bp.route('/')
 @login_required
@@ -90,16 +180,12 @@ def index():
 
     if current_user.role in ['Practice Manager', 'Super Admin']:
         # Show team overview for managers (excludes Super Admin from being scored)
-        staff = User.query.filter(
+        staff = User.query.options(STAFF_LIST_COLUMNS).filter(
             User.status == 'Active',
             User.role.in_(SCORABLE_ROLES)
         ).order_by(User.role, User.full_name).all()
 
-        scores_by_staff = {}
-        for member in staff:
-            score_data = calculate_monthly_score(member.id, current_month, current_year)
-            if score_data:
-                scores_by_staff[member.id] = score_data
+        scores_by_staff = calculate_monthly_scores_bulk(staff, current_month, current_year)
 
         return render_template('kpi/index.html',
                               staff=staff,
@@ -132,14 +218,13 @@ def my_kpis():
     scores_dict = {}
     scores = KPIScore.query.filter_by(
         staff_id=current_user.id,
-        month=month,
-        year=year
+        period=KPIScore.period_of(month, year)
     ).all()
     for score in scores:
         scores_dict[score.kpi_id] = score
 
     # Calculate overall score
-    score_summary = calculate_monthly_score(current_user.id, month, year)
+    score_summary = calculate_monthly_score(current_user, month, year)
 
     return render_template('kpi/my_kpis.html',
                           kpi_data=kpi_data,
@@ -156,7 +241,7 @@ def my_kpis():
 def score():
     """Score KPIs for a staff member."""
     # Get staff members who can be scored (excludes Super Admin)
-    staff_list = User.query.filter(
+    staff_list = User.query.options(STAFF_LIST_COLUMNS).filter(
         User.status == 'Active',
         User.role.in_(SCORABLE_ROLES)
     ).order_by(User.role, User.full_name).all()
@@ -174,46 +259,56 @@ def score():
             flash('Please select a staff member and month.', 'warning')
             return redirect(url_for('kpi.score'))
 
-        staff = User.query.get(staff_id)
+        staff = db.session.get(User, staff_id)
         if not staff or staff.role not in SCORABLE_ROLES:
             flash('Invalid staff member selected.', 'danger')
             return redirect(url_for('kpi.score'))
 
         # Get all KPIs for this role (Practice Manager uses Dentist KPIs)
-        kpi_role = get_kpi_role(staff.role)
-        role_kpis = RoleKPI.query.filter_by(role=kpi_role, is_active=True).all()
+        kpi_ids = get_role_kpi_ids(get_kpi_role(staff.role))
 
-        # Delete existing scores for this month (allow re-scoring)
-        KPIScore.query.filter_by(
-            staff_id=staff_id,
-            month=month,
-            year=year
-        ).delete()
-
-        # Save new scores
-        met_count = 0
-        total_count = 0
-
-        for kpi in role_kpis:
-            score_value = request.form.get(f'kpi_{kpi.id}', type=int)
-            notes = request.form.get(f'notes_{kpi.id}', '')
+        # Collect the submitted scores
+        rows = []
+        for kpi_id in kpi_ids:
+            score_value = request.form.get(f'kpi_{kpi_id}', type=int)
+            notes = request.form.get(f'notes_{kpi_id}', '')
 
             if score_value is not None:
-                kpi_score = KPIScore(
-                    staff_id=staff_id,
-                    kpi_id=kpi.id,
-                    month=month,
-                    year=year,
-                    score=score_value,
-                    notes=notes if notes else None,
-                    scored_by=current_user.id
-                )
-                db.session.add(kpi_score)
-                total_count += 1
-                if score_value == 1:
-                    met_count += 1
+                rows.append({
+                    'staff_id': staff_id,
+                    'kpi_id': kpi_id,
+                    'month': month,
+                    'year': year,
+                    'score': score_value,
+                    'notes': notes if notes else None,
+                    'scored_by': current_user.id
+                })
+
+        # Scores for KPIs left blank this time are removed (allows re-scoring)
+        KPIScore.query.filter(
+            KPIScore.staff_id == staff_id,
+            KPIScore.period == KPIScore.period_of(month, year),
+            KPIScore.kpi_id.notin_([row['kpi_id'] for row in rows])
+        ).delete()
 
-        db.session.commit()
+        # Every submitted score is written by one INSERT ... ON CONFLICT DO UPDATE on
+        # the (staff, KPI, month, year) unique constraint. Bulk writes skip mapper
+        # events, so the cached analytics charts are cleared after the commit below
+        # (cached exports are retired by the PerformanceEvent added below).
+        if rows:
+            upsert = UPSERT_INSERTS.get(db.engine.dialect.name, sqlite.insert)(KPIScore).values(rows)
+            db.session.execute(upsert.on_conflict_do_update(
+                index_elements=['staff_id', 'kpi_id', 'month', 'year'],
+                set_={
+                    'score': upsert.excluded.score,
+                    'notes': upsert.excluded.notes,
+                    'scored_by': upsert.excluded.scored_by,
+                    'scored_at': upsert.excluded.scored_at
+                }
+            ))
+
+        met_count = sum(1 for row in rows if row['score'] == 1)
+        total_count = len(rows)
 
         # Calculate percentage
         percentage = (met_count / total_count * 100) if total_count > 0 else 0
@@ -244,11 +339,20 @@ def score():
         )
         db.session.add(notification)
 
-        db.session.commit()
-
         # Check for auto-warning if below 70%
-        if percentage < 70:
-            check_kpi_warning(staff_id, month, year, percentage)
+        warning = check_kpi_warning(staff_id, month, year, percentage) if percentage < 70 else None
+
+        # Scores, event, notification and any auto-warning are saved in one transaction
+        db.session.commit()
+        clear_analytics_cache()
+
+        if warning:
+            log_audit('Auto-generated Warning', 'Warning', warning.id, {
+                'staff_id': staff_id,
+                'staff_name': staff.full_name,
+                'warning_type': 'KPI_Failed',
+                'auto_generated': True
+            })
 
         log_audit('Scored KPIs', 'KPIScore', None, {
             'staff_id': staff_id,
@@ -271,7 +375,7 @@ def score():
     selected_staff = None
 
     if selected_staff_id:
-        selected_staff = User.query.get(selected_staff_id)
+        selected_staff = db.session.get(User, selected_staff_id)
         if selected_staff and selected_staff.role in SCORABLE_ROLES:
             kpi_role = get_kpi_role(selected_staff.role)
             kpi_data = get_kpis_for_role(kpi_role)
@@ -279,8 +383,7 @@ def score():
             # Get existing scores if any
             scores = KPIScore.query.filter_by(
                 staff_id=selected_staff_id,
-                month=selected_month,
-                year=selected_year
+                period=KPIScore.period_of(selected_month, selected_year)
             ).all()
             for score in scores:
                 existing_scores[score.kpi_id] = score
@@ -313,7 +416,7 @@ def history(staff_id):
 
     # Get monthly summaries for the past 12 months
     today = date.today()
-    monthly_scores = []
+    periods = []
 
     for i in range(12):
         # Calculate month/year going backwards
@@ -322,8 +425,14 @@ def history(staff_id):
         while month <= 0:
             month += 12
             year -= 1
+        periods.append((month, year))
+
+    # All 12 months come back from one grouped query
+    scores_by_month = calculate_scores_by_month(staff, periods)
 
-        score_data = calculate_monthly_score(staff_id, month, year)
+    monthly_scores = []
+    for month, year in periods:
+        score_data = scores_by_month.get((month, year))
         if score_data:
             monthly_scores.append({
                 'month': month,
@@ -346,14 +455,16 @@ def rankings():
     year = request.args.get('year', today.year, type=int)
 
     # Get all staff who can be scored (excludes Super Admin)
-    staff = User.query.filter(
+    staff = User.query.options(STAFF_LIST_COLUMNS).filter(
         User.status == 'Active',
         User.role.in_(SCORABLE_ROLES)
     ).all()
 
+    scores_by_staff = calculate_monthly_scores_bulk(staff, month, year)
+
     rankings_data = []
     for member in staff:
-        score_data = calculate_monthly_score(member.id, month, year)
+        score_data = scores_by_staff.get(member.id)
         if score_data and score_data['scored']:
             rankings_data.append({
                 'staff': member,
@@ -375,16 +486,21 @@ def rankings():
 
 
 def check_kpi_warning(staff_id, month, year, percentage):
-    """Check if staff should receive an auto-warning for low KPI performance."""
+    """
+    Check if staff should receive an auto-warning for low KPI performance.
+    Any warning is added to the session for the caller to commit, and returned.
+    """
     # Check previous month as well
     prev_month = month - 1 if month > 1 else 12
     prev_year = year if month > 1 else year - 1
 
-    prev_score = calculate_monthly_score(staff_id, prev_month, prev_year)
+    # The current month's percentage comes from the scores just saved, so only
+    # the previous month is read back
+    staff = db.session.get(User, staff_id)
+    prev_score = calculate_monthly_score(staff, prev_month, prev_year)
 
     # If 2 consecutive months below 70%, issue warning
     if prev_score and prev_score['percentage'] < 70:
-        staff = User.query.get(staff_id)
         warning = Warning(
             staff_id=staff_id,
             warning_type='KPI_Failed',
@@ -403,15 +519,9 @@ def check_kpi_warning(staff_id, month, year, percentage):
             link=url_for('warnings.index')
         )
         db.session.add(notification)
+        return warning
 
-        db.session.commit()
-
-        log_audit('Auto-generated Warning', 'Warning', warning.id, {
-            'staff_id': staff_id,
-            'staff_name': staff.full_name,
-            'warning_type': 'KPI_Failed',
-            'auto_generated': True
-        })
+    return None
 
 
 @bp.route('/view-kpis')
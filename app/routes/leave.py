@@ -7,14 +7,23 @@ from app import db, mail
 from app.models import LeaveRequest, User, PerformanceEvent, Schedule, Notification
 from app.utils.decorators import manager_required
 from app.utils.audit import log_audit
+from app.utils.helpers import count_weekdays
 from app.utils.email import (
-    send_email, email_leave_request_submitted,
+    send_email, send_bulk_email, email_leave_request_submitted,
     email_leave_request_approved, email_leave_request_rejected
 )
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import joinedload, selectinload
 
 bp = Blueprint('leave', __name__, url_prefix='/leave')
 
+# Staff notified of new leave requests
+MANAGER_CRITERIA = (
+    User.role.in_(['Practice Manager', 'Super Admin']),
+    User.status == 'Active'
+)
+
 # SA BCEA Leave Types and Entitlements
 # Annual Leave: 21 consecutive days (or by agreement: 1 day per 17 days worked, or 1 hour per 17 hours worked)
 # Sick Leave: 30 days over a 3-year cycle (6 weeks)
@@ -119,28 +128,26 @@ def calculate_leave_balance(user_id):
         'Family Responsibility': 3,
     }
 
+    # Approved leave this year for all entitled types in one query (dates only)
+    approved_leave = LeaveRequest.query.with_entities(
+        LeaveRequest.leave_type, LeaveRequest.start_date, LeaveRequest.end_date
+    ).filter(
+        LeaveRequest.staff_id == user_id,
+        LeaveRequest.leave_type.in_(entitlements),
+        LeaveRequest.status == 'Approved',
+        LeaveRequest.start_date >= year_start,
+        LeaveRequest.start_date <= year_end
+    ).all()
+
+    # Calculate days used (excluding weekends)
+    used_by_type = dict.fromkeys(entitlements, 0)
+    for leave in approved_leave:
+        used_by_type[leave.leave_type] += count_weekdays(leave.start_date, leave.end_date)
+
     balance = {}
 
     for leave_type, total_days in entitlements.items():
-        # Get approved leave for this type this year
-        approved_leave = LeaveRequest.query.filter(
-            LeaveRequest.staff_id == user_id,
-            LeaveRequest.leave_type == leave_type,
-            LeaveRequest.status == 'Approved',
-            LeaveRequest.start_date >= year_start,
-            LeaveRequest.start_date <= year_end
-        ).all()
-
-        # Calculate days used (excluding weekends)
-        days_used = 0
-        for leave in approved_leave:
-            current_date = leave.start_date
-            while current_date <= leave.end_date:
-                # Count only weekdays
-                if current_date.weekday() < 5:  # Monday = 0, Friday = 4
-                    days_used += 1
-                current_date = current_date + timedelta(days=1)
-
+        days_used = used_by_type[leave_type]
         balance[leave_type] = {
             'total': total_days,
             'used': days_used,
@@ -150,20 +157,25 @@ def calculate_leave_balance(user_id):
     return balance
 
 
+def leave_list_loads():
+    """Eager loads for the names shown in leave lists (one IN query each, not one query per row)."""
+    return selectinload(LeaveRequest.staff), selectinload(LeaveRequest.approver)
+
+
 @bp.route('/')
 @login_required
 def index():
     """View leave requests."""
     if current_user.role in ['Practice Manager', 'Super Admin']:
         # Managers see all requests
-        pending = LeaveRequest.query.filter_by(status='Pending').order_by(LeaveRequest.created_at.desc()).all()
-        processed = LeaveRequest.query.filter(LeaveRequest.status != 'Pending').order_by(LeaveRequest.approved_at.desc()).limit(20).all()
+        pending = LeaveRequest.query.options(*leave_list_loads()).filter_by(status='Pending').order_by(LeaveRequest.created_at.desc()).all()
+        processed = LeaveRequest.query.options(*leave_list_loads()).filter(LeaveRequest.status != 'Pending').order_by(LeaveRequest.approved_at.desc()).limit(20).all()
         # For managers, show their own balance
         leave_balance = calculate_leave_balance(current_user.id)
     else:
         # Staff see only their own
-        pending = LeaveRequest.query.filter_by(staff_id=current_user.id, status='Pending').all()
-        processed = LeaveRequest.query.filter(
+        pending = LeaveRequest.query.options(*leave_list_loads()).filter_by(staff_id=current_user.id, status='Pending').all()
+        processed = LeaveRequest.query.options(*leave_list_loads()).filter(
             LeaveRequest.staff_id == current_user.id,
             LeaveRequest.status != 'Pending'
         ).order_by(LeaveRequest.approved_at.desc()).all()
@@ -200,34 +212,37 @@ def request_leave():
             'end_date': leave.end_date.isoformat()
         })
 
-        # Send notification to managers (Practice Manager and Super Admin)
-        managers = User.query.filter(
-            User.role.in_(['Practice Manager', 'Super Admin']),
-            User.status == 'Active'
-        ).all()
-        for manager in managers:
-            notification = Notification(
-                user_id=manager.id,
-                title='New Leave Request',
-                message=f'{current_user.full_name} has requested {leave.leave_type} leave from {leave.start_date.strftime("%d %b %Y")} to {leave.end_date.strftime("%d %b %Y")}',
-                notification_type='leave_request',
-                link=url_for('leave.approve', leave_id=leave.id)
-            )
-            db.session.add(notification)
+        # Notify managers (Practice Manager and Super Admin) with one INSERT ... SELECT,
+        # so the database fans the notification out without manager rows crossing the wire
+        message = f'{current_user.full_name} has requested {leave.leave_type} leave from {leave.start_date.strftime("%d %b %Y")} to {leave.end_date.strftime("%d %b %Y")}'
+        link = url_for('leave.approve', leave_id=leave.id)
+        db.session.execute(insert(Notification).from_select(
+            ['user_id', 'title', 'message', 'notification_type', 'link', 'is_read', 'created_at'],
+            select(
+                User.id,
+                literal('New Leave Request'),
+                literal(message),
+                literal('leave_request'),
+                literal(link),
+                literal(False),
+                literal(datetime.utcnow())
+            ).where(*MANAGER_CRITERIA)
+        ))
         db.session.commit()
 
-        # Send email to managers
+        # Send email to managers (one background thread and SMTP connection for all of them)
         if current_app.config.get('MAIL_ENABLED'):
-            for manager in managers:
-                if manager.email:
-                    html = email_leave_request_submitted(
-                        current_user.full_name,
-                        leave.leave_type,
-                        leave.start_date.strftime('%d %b %Y'),
-                        leave.end_date.strftime('%d %b %Y'),
-                        leave.reason
-                    )
-                    send_email(f'Leave Request from {current_user.full_name}', manager.email, html, mail)
+            html = email_leave_request_submitted(
+                current_user.full_name,
+                leave.leave_type,
+                leave.start_date.strftime('%d %b %Y'),
+                leave.end_date.strftime('%d %b %Y'),
+                leave.reason
+            )
+            send_bulk_email(
+                f'Leave Request from {current_user.full_name}',
+                db.session.scalars(select(User.email).where(*MANAGER_CRITERIA)).all(), html, mail
+            )
 
         flash('Leave request submitted successfully.', 'success')
         return redirect(url_for('leave.index'))
@@ -240,7 +255,8 @@ def request_leave():
 @manager_required
 def approve(leave_id):
     """Approve or reject a leave request."""
-    leave = LeaveRequest.query.get_or_404(leave_id)
+    # The staff member is joined in, for the approval page and the decision email
+    leave = LeaveRequest.query.options(joinedload(LeaveRequest.staff)).get_or_404(leave_id)
 
     if leave.status != 'Pending':
         flash('This leave request has already been processed.', 'warning')
@@ -261,20 +277,15 @@ def approve(leave_id):
         leave.approved_by = current_user.id
         leave.approval_notes = form.approval_notes.data
         leave.approved_at = datetime.utcnow()
-        db.session.commit()
 
-        # If approved, automatically remove conflicting schedules
+        # If approved, automatically remove conflicting schedules (one DELETE statement)
         removed_schedules = 0
         if leave.status == 'Approved':
-            conflicting = Schedule.query.filter(
+            removed_schedules = Schedule.query.filter(
                 Schedule.staff_id == leave.staff_id,
                 Schedule.date >= leave.start_date,
                 Schedule.date <= leave.end_date
-            ).all()
-            removed_schedules = len(conflicting)
-            for schedule in conflicting:
-                db.session.delete(schedule)
-            db.session.commit()
+            ).delete(synchronize_session=False)  # no schedules loaded in this session
 
         # Create performance event
         event = PerformanceEvent(
@@ -291,13 +302,6 @@ def approve(leave_id):
             created_by=current_user.id
         )
         db.session.add(event)
-        db.session.commit()
-
-        log_audit(action, 'LeaveRequest', leave.id, {
-            'staff_id': leave.staff_id,
-            'status': leave.status,
-            'notes': leave.approval_notes
-        })
 
         # Send notification to the employee
         status_text = 'approved' if leave.status == 'Approved' else 'rejected'
@@ -309,11 +313,19 @@ def approve(leave_id):
             link=url_for('leave.index')
         )
         db.session.add(notification)
+
+        # The decision, schedule removal, performance event and notification are written together
         db.session.commit()
 
+        log_audit(action, 'LeaveRequest', leave.id, {
+            'staff_id': leave.staff_id,
+            'status': leave.status,
+            'notes': leave.approval_notes
+        })
+
         # Send email to staff member
         if current_app.config.get('MAIL_ENABLED'):
-            staff_member = User.query.get(leave.staff_id)
+            staff_member = leave.staff
             if staff_member and staff_member.email:
                 if leave.status == 'Approved':
                     html = email_leave_request_approved(
@@ -340,8 +352,7 @@ def approve(leave_id):
         flash(msg, 'success')
         return redirect(url_for('leave.index'))
 
-    staff = User.query.get(leave.staff_id)
-    return render_template('leave/approve.html', form=form, leave=leave, staff=staff)
+    return render_template('leave/approve.html', form=form, leave=leave, staff=leave.staff)
 
 
 @bp.route('/calendar')
@@ -349,7 +360,7 @@ def approve(leave_id):
 def calendar_view():
     """View leave calendar."""
     # Get approved leave for all staff
-    approved_leave = LeaveRequest.query.filter_by(status='Approved').all()
+    approved_leave = LeaveRequest.query.options(selectinload(LeaveRequest.staff)).filter_by(status='Approved').all()
 
     return render_template('leave/calendar.html', approved_leave=approved_leave)
 
@@ -1,30 +1,65 @@
 """Notifications routes for system alerts and notifications."""
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import select, func, lambda_stmt
 from app import db
 from app.models import Notification, Task, User
+from app.utils.decorators import per_request_cache
 from datetime import datetime, date, timedelta
+import hmac
+import os
 
 bp = Blueprint('notifications', __name__, url_prefix='/notifications')
 
+# Task notifications link here; a plain path because the checks also run from the CLI, outside a request
+TASKS_LINK = '/tasks/'
 
-def create_notification(user_id, title, message, notification_type, link=None):
-    """Create a notification for a user."""
-    notification = Notification(
+
+def create_notification(user_id, title, message, notification_type, link=None, related_task_id=None):
+    """Build a notification for a user (not yet added to the session)."""
+    return Notification(
         user_id=user_id,
         title=title,
         message=message,
         notification_type=notification_type,
-        link=link
+        link=link,
+        related_task_id=related_task_id
     )
-    db.session.add(notification)
-    db.session.commit()
-    return notification
+
+
+@per_request_cache
+def count_unread_notifications(user_id, notification_type=None):
+    """Count a user's unread notifications, optionally of one type (memoized per request)."""
+    # Polled from every page; the lambda statement's compiled SQL is cached across requests
+    stmt = lambda_stmt(
+        lambda: select(func.count(Notification.id)).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        )
+    )
+    if notification_type:
+        stmt += lambda s: s.where(Notification.notification_type == notification_type)
+    return db.session.execute(stmt).scalar()
+
+
+def notified_today(notification_type, tasks, today_start):
+    """(user_id, task_id) pairs already sent a notification of this type about one of the tasks today."""
+    if not tasks:
+        return set()
+    return {
+        (user_id, task_id)
+        for user_id, task_id in db.session.query(Notification.user_id, Notification.related_task_id).filter(
+            Notification.notification_type == notification_type,
+            Notification.related_task_id.in_([task.id for task in tasks]),
+            Notification.created_at >= today_start
+        )
+    }
 
 
 def check_overdue_tasks():
-    """Check for overdue tasks and create notifications."""
+    """Check for overdue tasks and return the notifications to create."""
     today = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
 
     # Find overdue tasks
     overdue_tasks = Task.query.filter(
@@ -32,89 +67,125 @@ def check_overdue_tasks():
         Task.status != 'Done'
     ).all()
 
+    # Tasks already notified about today, from one query rather than one per task
+    already_notified = notified_today('task_overdue', overdue_tasks, today_start)
+
+    to_create = []
     for task in overdue_tasks:
         if task.assigned_to:
-            # Check if notification already exists for this task today
-            existing = Notification.query.filter(
-                Notification.user_id == task.assigned_to,
-                Notification.notification_type == 'task_overdue',
-                Notification.message.contains(str(task.id)),
-                Notification.created_at >= datetime.combine(today, datetime.min.time())
-            ).first()
-
-            if not existing:
+            if (task.assigned_to, task.id) not in already_notified:
                 days_overdue = (today - task.due_date).days
-                create_notification(
+                to_create.append(create_notification(
                     user_id=task.assigned_to,
                     title='Overdue Task',
                     message=f'Task "{task.title}" is {days_overdue} day(s) overdue. [Task ID: {task.id}]',
                     notification_type='task_overdue',
-                    link=url_for('tasks.index')
-                )
+                    link=TASKS_LINK,
+                    related_task_id=task.id
+                ))
 
     # Notify managers about all overdue tasks
-    managers = User.query.filter(
-        User.role.in_(['Practice Manager', 'Super Admin']),
-        User.status == 'Active'
-    ).all()
-
     if overdue_tasks:
-        for manager in managers:
-            # Check if notification already exists for managers today
-            existing = Notification.query.filter(
-                Notification.user_id == manager.id,
+        managers = User.query.filter(
+            User.role.in_(['Practice Manager', 'Super Admin']),
+            User.status == 'Active'
+        ).all()
+
+        # Managers who already got today's summary, in one query
+        summarised = {
+            user_id for (user_id,) in db.session.query(Notification.user_id).filter(
                 Notification.notification_type == 'task_overdue',
                 Notification.title == 'Overdue Tasks Summary',
-                Notification.created_at >= datetime.combine(today, datetime.min.time())
-            ).first()
+                Notification.created_at >= today_start
+            )
+        }
 
-            if not existing:
-                create_notification(
+        for manager in managers:
+            if manager.id not in summarised:
+                to_create.append(create_notification(
                     user_id=manager.id,
                     title='Overdue Tasks Summary',
                     message=f'There are {len(overdue_tasks)} overdue task(s) that need attention.',
                     notification_type='task_overdue',
-                    link=url_for('tasks.index')
-                )
+                    link=TASKS_LINK
+                ))
+
+    return to_create
 
 
 def check_upcoming_tasks():
-    """Check for tasks due tomorrow and create reminders."""
-    tomorrow = date.today() + timedelta(days=1)
+    """Check for tasks due tomorrow and return the reminders to create."""
+    today = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+    tomorrow = today + timedelta(days=1)
 
     tasks_due_tomorrow = Task.query.filter(
         Task.due_date == tomorrow,
         Task.status != 'Done'
     ).all()
 
+    # Reminders already sent today, from one query rather than one per task
+    already_reminded = notified_today('task_reminder', tasks_due_tomorrow, today_start)
+
+    to_create = []
     for task in tasks_due_tomorrow:
         if task.assigned_to:
-            # Check if reminder already sent
-            existing = Notification.query.filter(
-                Notification.user_id == task.assigned_to,
-                Notification.notification_type == 'task_reminder',
-                Notification.message.contains(str(task.id)),
-                Notification.created_at >= datetime.combine(date.today(), datetime.min.time())
-            ).first()
-
-            if not existing:
-                create_notification(
+            if (task.assigned_to, task.id) not in already_reminded:
+                to_create.append(create_notification(
                     user_id=task.assigned_to,
                     title='Task Due Tomorrow',
                     message=f'Task "{task.title}" is due tomorrow. [Task ID: {task.id}]',
                     notification_type='task_reminder',
-                    link=url_for('tasks.index')
-                )
+                    link=TASKS_LINK,
+                    related_task_id=task.id
+                ))
+
+    return to_create
+
+
+def check_task_notifications():
+    """
+    Create overdue and due-tomorrow task notifications and return how many were created.
+    Run on a schedule (CLI command or cron endpoint) rather than on page load.
+    """
+    to_create = check_overdue_tasks() + check_upcoming_tasks()
+
+    # Written after all the existence checks in one bulk INSERT (no per-row RETURNING of ids)
+    if to_create:
+        db.session.bulk_save_objects(to_create)
+        db.session.commit()
+
+    return len(to_create)
+
+
+@bp.route('/cron/task-notifications', methods=['GET', 'POST'])
+def cron_task_notifications():
+    """
+    Endpoint for external cron services to trigger the task notification checks.
+    Protected by a secret key in the query string.
+    Usage: GET /notifications/cron/task-notifications?key=YOUR_SECRET_KEY
+    """
+    # Check for secret key (set CRON_SECRET in environment variables); disabled when unset
+    secret = current_app.config.get('CRON_SECRET') or os.environ.get('CRON_SECRET')
+    if not secret:
+        return jsonify({'error': 'CRON_SECRET is not configured'}), 403
+
+    provided_key = request.args.get('key') or ''
+    if not hmac.compare_digest(provided_key.encode(), secret.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    created = check_task_notifications()
+    return jsonify({
+        'success': True,
+        'notifications_created': created,
+        'date': date.today().isoformat()
+    })
 
 
 @bp.route('/')
 @login_required
 def index():
     """View all notifications."""
-    # Run notification checks
-    check_overdue_tasks()
-    check_upcoming_tasks()
-
     # Mark all notifications as read when viewing the page
     Notification.query.filter_by(
         user_id=current_user.id,
@@ -134,10 +205,7 @@ def index():
 @login_required
 def unread_count():
     """Get unread notification count (for AJAX)."""
-    count = Notification.query.filter_by(
-        user_id=current_user.id,
-        is_read=False
-    ).count()
+    count = count_unread_notifications(current_user.id)
     return jsonify({'count': count})
 
 
@@ -168,7 +236,7 @@ def mark_all_read():
     Notification.query.filter_by(
         user_id=current_user.id,
         is_read=False
-    ).update({'is_read': True})
+    ).update({'is_read': True}, synchronize_session=False)  # no notifications loaded in this session
     db.session.commit()
 
     flash('All notifications marked as read.', 'success')
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request
 from flask_login import login_required, current_user
+from sqlalchemy import func
+from app import db
 from app.models import User, PerformanceEvent, KPIScore, Task, Warning, LeaveRequest
 from app.utils.decorators import manager_required
 from datetime import date, timedelta
@@ -68,16 +70,11 @@ def timeline(staff_id):
     total_warnings = Warning.query.filter_by(staff_id=staff_id).count()
     total_tasks_completed = Task.query.filter_by(assigned_to=staff_id, status='Done').count()
 
-    # Recent KPI average
-    recent_kpis = KPIScore.query.filter(
+    # Recent KPI average, computed in SQL (None when there are no recent scores)
+    kpi_avg = db.session.query(func.avg(KPIScore.score) * 100).filter(
         KPIScore.staff_id == staff_id,
         KPIScore.scored_at >= date.today() - timedelta(days=30)
-    ).all()
-
-    if recent_kpis:
-        kpi_avg = (sum(k.score for k in recent_kpis) / len(recent_kpis)) * 100
-    else:
-        kpi_avg = None
+    ).scalar()
 
     return render_template('performance/timeline.html',
                           staff=staff,
@@ -98,35 +95,33 @@ def summary():
     """View team performance summary."""
     staff = User.query.filter_by(status='Active').all()
 
-    summary_data = []
-    for member in staff:
-        # Get warning count
-        warnings = Warning.query.filter_by(staff_id=member.id).count()
+    today = date.today()
+    month_start = today.replace(day=1)
+    kpi_cutoff = today - timedelta(days=30)
 
-        # Get completed tasks this month
-        month_start = date.today().replace(day=1)
-        tasks_completed = Task.query.filter(
-            Task.assigned_to == member.id,
+    # Per-member figures from three grouped queries instead of three queries per member
+    warning_totals = dict(
+        db.session.query(Warning.staff_id, func.count(Warning.id)).group_by(Warning.staff_id).all()
+    )
+    tasks_completed_totals = dict(
+        db.session.query(Task.assigned_to, func.count(Task.id)).filter(
             Task.status == 'Done',
             Task.updated_at >= month_start
-        ).count()
-
-        # Get recent KPI average
-        recent_kpis = KPIScore.query.filter(
-            KPIScore.staff_id == member.id,
-            KPIScore.scored_at >= date.today() - timedelta(days=30)
-        ).all()
-
-        if recent_kpis:
-            kpi_avg = (sum(k.score for k in recent_kpis) / len(recent_kpis)) * 100
-        else:
-            kpi_avg = None
+        ).group_by(Task.assigned_to).all()
+    )
+    kpi_averages = dict(
+        db.session.query(KPIScore.staff_id, func.avg(KPIScore.score) * 100).filter(
+            KPIScore.scored_at >= kpi_cutoff
+        ).group_by(KPIScore.staff_id).all()
+    )
 
+    summary_data = []
+    for member in staff:
         summary_data.append({
             'staff': member,
-            'warnings': warnings,
-            'tasks_completed': tasks_completed,
-            'kpi_avg': kpi_avg
+            'warnings': warning_totals.get(member.id, 0),
+            'tasks_completed': tasks_completed_totals.get(member.id, 0),
+            'kpi_avg': kpi_averages.get(member.id)  # None when there are no recent scores
         })
 
     return render_template('performance/summary.html', summary_data=summary_data)
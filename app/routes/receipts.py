@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from flask_wtf import FlaskForm
 from wtforms import StringField, DecimalField, SelectField, TextAreaField, DateField, SubmitField, EmailField
 from wtforms.validators import DataRequired, NumberRange, Optional, Email
+from sqlalchemy import func
 from app import db, mail
 from app.models import Receipt
 from app.utils.decorators import receipt_access_required
@@ -207,12 +208,22 @@ def daily_summary():
         selected_date = date.today()
         date_str = selected_date.isoformat()
 
-    receipts = Receipt.query.filter_by(date=selected_date).all()
+    # Totals per payment method from one grouped query
+    totals = dict(
+        db.session.query(Receipt.payment_method, func.sum(Receipt.amount)).filter(
+            Receipt.date == selected_date
+        ).group_by(Receipt.payment_method).all()
+    )
+
+    cash_total = totals.get('Cash', 0)
+    card_total = totals.get('Card', 0)
+    eft_total = totals.get('EFT', 0)
+    grand_total = sum(totals.values())
 
-    cash_total = sum(r.amount for r in receipts if r.payment_method == 'Cash')
-    card_total = sum(r.amount for r in receipts if r.payment_method == 'Card')
-    eft_total = sum(r.amount for r in receipts if r.payment_method == 'EFT')
-    grand_total = sum(r.amount for r in receipts)
+    page = request.args.get('page', 1, type=int)
+    receipts = Receipt.query.filter_by(date=selected_date).order_by(Receipt.created_at.desc()).paginate(
+        page=page, per_page=20, error_out=False
+    )
 
     return render_template('receipts/daily_summary.html',
                           receipts=receipts,
@@ -42,6 +42,14 @@ def get_all_active_staff():
     return User.query.filter_by(status='Active').order_by(User.full_name).all()
 
 
+def get_user_names(user_ids):
+    """Map user ids (ints or the string keys stored in JSON columns) to full names in one query."""
+    ids = {int(user_id) for user_id in user_ids}
+    if not ids:
+        return {}
+    return dict(User.query.with_entities(User.id, User.full_name).filter(User.id.in_(ids)).all())
+
+
 @bp.route('/')
 @login_required
 def index():
@@ -333,21 +341,22 @@ def view(rec_id):
     """View a reconciliation sheet."""
     rec = DailyReconciliation.query.get_or_404(rec_id)
 
+    # Look up every dentist named on the sheet in one query
+    names = get_user_names(list(rec.dentists_on_duty or []) + list(rec.appointments_booked or {}))
+
     # Get dentist names for display
     dentist_names = []
     if rec.dentists_on_duty:
         for d_id in rec.dentists_on_duty:
-            dentist = User.query.get(d_id)
-            if dentist:
-                dentist_names.append(dentist.full_name)
+            if int(d_id) in names:
+                dentist_names.append(names[int(d_id)])
 
     # Get appointments with dentist names
     appointments_display = {}
     if rec.appointments_booked:
         for d_id, count in rec.appointments_booked.items():
-            dentist = User.query.get(int(d_id))
-            if dentist:
-                appointments_display[dentist.full_name] = count
+            if int(d_id) in names:
+                appointments_display[names[int(d_id)]] = count
 
     return render_template('reconciliation/view.html',
                           rec=rec,
@@ -544,16 +553,18 @@ def analytics():
             day_analysis[day]['avg_collections'] = 0
             day_analysis[day]['avg_patients'] = 0
 
-    # Doctor performance
+    # Doctor performance (names for all dentists in the period loaded in one query)
+    names = get_user_names(
+        d_id for r in reconciliations if r.dentists_on_duty and r.appointments_booked for d_id in r.dentists_on_duty
+    )
     doctor_stats = {}
     for r in reconciliations:
         if r.dentists_on_duty and r.appointments_booked:
             for d_id in r.dentists_on_duty:
                 d_id_str = str(d_id)
                 if d_id not in doctor_stats:
-                    dentist = User.query.get(d_id)
                     doctor_stats[d_id] = {
-                        'name': dentist.full_name if dentist else f'Doctor {d_id}',
+                        'name': names.get(int(d_id), f'Doctor {d_id}'),
                         'days_worked': 0,
                         'total_appointments': 0,
                     }
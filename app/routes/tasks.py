@@ -107,7 +107,7 @@ def create():
 
         # Send email to assigned staff
         if current_app.config.get('MAIL_ENABLED') and task.assigned_to:
-            assignee = User.query.get(task.assigned_to)
+            assignee = db.session.get(User, task.assigned_to)
             if assignee and assignee.email:
                 html = email_task_assigned(
                     assignee.full_name,
@@ -8,6 +8,7 @@ from app.models import Warning, User, PerformanceEvent
 from app.utils.decorators import manager_required
 from app.utils.audit import log_audit
 from app.utils.email import send_email, email_warning_issued
+from sqlalchemy.orm import selectinload
 
 bp = Blueprint('warnings', __name__, url_prefix='/warnings')
 
@@ -31,10 +32,14 @@ def index():
     """View warnings."""
     if current_user.role in ['Practice Manager', 'Super Admin']:
         # Managers see all warnings
-        warnings = Warning.query.order_by(Warning.issued_at.desc()).limit(50).all()
+        warnings = Warning.query.options(
+            selectinload(Warning.staff), selectinload(Warning.issuer)
+        ).order_by(Warning.issued_at.desc()).limit(50).all()
     else:
         # Staff see only their own
-        warnings = Warning.query.filter_by(staff_id=current_user.id).order_by(Warning.issued_at.desc()).all()
+        warnings = Warning.query.options(
+            selectinload(Warning.staff), selectinload(Warning.issuer)
+        ).filter_by(staff_id=current_user.id).order_by(Warning.issued_at.desc()).all()
 
     return render_template('warnings/index.html', warnings=warnings)
 
@@ -61,7 +66,7 @@ def issue():
         db.session.commit()
 
         # Create performance event
-        staff = User.query.get(form.staff_id.data)
+        staff = db.session.get(User, form.staff_id.data)
         event = PerformanceEvent(
             staff_id=form.staff_id.data,
             event_type='Warning',
@@ -108,6 +113,6 @@ def staff_warnings(staff_id):
         return redirect(url_for('warnings.index'))
 
     staff = User.query.get_or_404(staff_id)
-    warnings = Warning.query.filter_by(staff_id=staff_id).order_by(Warning.issued_at.desc()).all()
+    warnings = Warning.query.options(selectinload(Warning.issuer)).filter_by(staff_id=staff_id).order_by(Warning.issued_at.desc()).all()
 
     return render_template('warnings/staff_warnings.html', staff=staff, warnings=warnings)
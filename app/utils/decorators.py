@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import abort
+from flask import abort, g
 from flask_login import current_user
 
 
@@ -35,3 +35,19 @@ def admin_required(f):
 def receipt_access_required(f):
     """Decorator for receipt creation - Receptionist, Practice Manager, Super Admin, Dentist."""
     return role_required('Receptionist', 'Practice Manager', 'Super Admin', 'Dentist')(f)
+
+
+def per_request_cache(f):
+    """
+    Memoize a function's result for the rest of the current request.
+    Results live on flask.g, so they are discarded when the request ends.
+    Usage: @per_request_cache on helpers called with hashable positional args.
+    """
+    @wraps(f)
+    def decorated_function(*args):
+        cache = g.setdefault('_per_request_cache', {})
+        key = (f.__module__, f.__name__, args)
+        if key not in cache:
+            cache[key] = f(*args)
+        return cache[key]
+    return decorated_function
@@ -4,11 +4,13 @@ from flask_mail import Message
 from threading import Thread
 
 
-def send_async_email(app, msg, mail):
-    """Send email asynchronously."""
+def send_async_email(app, messages, mail):
+    """Send emails asynchronously over a single SMTP connection."""
     with app.app_context():
         try:
-            mail.send(msg)
+            with mail.connect() as conn:
+                for msg in messages:
+                    conn.send(msg)
         except Exception as e:
             current_app.logger.error(f"Failed to send email: {e}")
 
@@ -23,19 +25,37 @@ def send_email(subject, recipient, html_body, mail):
         html_body: HTML content of the email
         mail: Flask-Mail instance
     """
-    if not recipient:
-        return
+    send_bulk_email(subject, [recipient], html_body, mail)
+
+
+def send_bulk_email(subject, recipients, html_body, mail):
+    """
+    Send the same email notification to several recipients.
+
+    Each recipient gets their own message, but all of them go out from one
+    background thread over one SMTP connection.
 
-    msg = Message(
-        subject=f"[StaffTrack] {subject}",
-        recipients=[recipient],
-        html=html_body
-    )
+    Args:
+        subject: Email subject
+        recipients: Email addresses to send to (blank entries are skipped)
+        html_body: HTML content of the email
+        mail: Flask-Mail instance
+    """
+    messages = [
+        Message(
+            subject=f"[StaffTrack] {subject}",
+            recipients=[recipient],
+            html=html_body
+        )
+        for recipient in recipients if recipient
+    ]
+    if not messages:
+        return
 
     # Send asynchronously to not block the request
     Thread(
         target=send_async_email,
-        args=(current_app._get_current_object(), msg, mail)
+        args=(current_app._get_current_object(), messages, mail)
     ).start()
 
 
@@ -1,13 +1,77 @@
 """Export utilities for PDF and Excel generation."""
-from io import BytesIO
+import csv
+from io import StringIO
+from tempfile import SpooledTemporaryFile
 from datetime import datetime, date
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from functools import cache
+from itertools import chain, islice
+from flask import current_app
+
+# openpyxl and reportlab are imported inside the report builders: they are
+# the slowest imports in the app and only export requests need them.
+
+# Leading rows used to size Excel columns (the rest are streamed without being inspected)
+WIDTH_SAMPLE_ROWS = 100
+
+# Data rows per PDF table block (kept even so alternating row shading lines up)
+PDF_TABLE_CHUNK_ROWS = 500
+
+# Month abbreviations for the date formatters (f-strings are several times faster
+# than strftime, which matters once a report has thousands of rows)
+MONTH_ABBR = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# CSV rows written per chunk sent to the client
+CSV_CHUNK_ROWS = 500
+
+# Generated files are kept in memory up to this size, then spill to a temporary file
+SPOOL_MAX_SIZE = 1024 * 1024
+
+
+def report_buffer():
+    """
+    Create the file object a report is written into. send_file() streams it to
+    the client in blocks, so large reports never sit in memory in full.
+    """
+    return SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+
+
+@cache
+def pdf_styles():
+    """
+    Paragraph styles for PDF reports: reportlab's sample stylesheet plus the
+    report title styles. Built once per process, on the first PDF export.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'ReportTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#16a34a'),
+        spaceAfter=10
+    ))
+    styles.add(ParagraphStyle(
+        'ReportSubtitle',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.grey,
+        spaceAfter=20
+    ))
+    styles.add(ParagraphStyle(
+        'StaffReportTitle',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.HexColor('#16a34a')
+    ))
+    return styles
+
+
+@cache
+def warn_missing_lxml():
+    """Log, once per process, that Excel exports are using openpyxl's slower stdlib XML writer."""
+    current_app.logger.warning('lxml is not installed; Excel exports use the slower stdlib XML writer')
 
 
 def create_excel_report(title, headers, data, filename_prefix):
@@ -17,20 +81,32 @@ def create_excel_report(title, headers, data, filename_prefix):
     Args:
         title: Report title
         headers: List of column headers
-        data: List of rows (each row is a list of values)
+        data: Iterable of rows (each row is a list of values); may be a generator
         filename_prefix: Prefix for the filename
 
     Returns:
-        BytesIO buffer containing the Excel file
+        File object (rewound) containing the Excel file
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = title[:31]  # Excel sheet names max 31 chars
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.utils import get_column_letter
+    from openpyxl.xml import LXML
+
+    # openpyxl writes through lxml when it is installed (see requirements.txt)
+    if not LXML:
+        warn_missing_lxml()
+
+    # Write-only mode streams rows to the file as they are appended instead of
+    # keeping every cell object in memory; rows must be written top to bottom.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title[:31])  # Excel sheet names max 31 chars
 
     # Styles
     header_font = Font(bold=True, color="FFFFFF")
     header_fill = PatternFill(start_color="16a34a", end_color="16a34a", fill_type="solid")
     header_alignment = Alignment(horizontal="center", vertical="center")
+    data_alignment = Alignment(vertical="center")
     thin_border = Border(
         left=Side(style='thin'),
         right=Side(style='thin'),
@@ -38,48 +114,51 @@ def create_excel_report(title, headers, data, filename_prefix):
         bottom=Side(style='thin')
     )
 
+    def styled_cell(value, **styles):
+        cell = WriteOnlyCell(ws, value=value)
+        for name, style in styles.items():
+            setattr(cell, name, style)
+        return cell
+
+    # Column widths must be set before any row is written, so size them from
+    # the leading rows and stream the remainder straight through
+    rows = iter(data)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    widths = [len(str(header)) for header in headers]
+    for row_data in sample:
+        for col_idx, value in enumerate(row_data):
+            widths[col_idx] = max(widths[col_idx], len(str(value)))
+    for col_idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = min(width + 2, 50)
+
     # Title row
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
-    title_cell = ws.cell(row=1, column=1, value=title)
-    title_cell.font = Font(bold=True, size=14)
-    title_cell.alignment = Alignment(horizontal="center")
+    ws.append([styled_cell(title, font=Font(bold=True, size=14), alignment=Alignment(horizontal="center"))])
+    ws.merged_cells.add(f"A1:{get_column_letter(len(headers))}1")
 
     # Date row
-    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=len(headers))
-    date_cell = ws.cell(row=2, column=1, value=f"Generated: {datetime.now().strftime('%d %b %Y %H:%M')}")
-    date_cell.alignment = Alignment(horizontal="center")
-    date_cell.font = Font(italic=True, size=10)
+    ws.append([styled_cell(
+        f"Generated: {datetime.now().strftime('%d %b %Y %H:%M')}",
+        font=Font(italic=True, size=10),
+        alignment=Alignment(horizontal="center")
+    )])
+    ws.merged_cells.add(f"A2:{get_column_letter(len(headers))}2")
+    ws.append([])
 
     # Headers row
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=4, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
+    ws.append([
+        styled_cell(header, font=header_font, fill=header_fill, alignment=header_alignment, border=thin_border)
+        for header in headers
+    ])
 
     # Data rows
-    for row_idx, row_data in enumerate(data, 5):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-            cell.alignment = Alignment(vertical="center")
-
-    # Auto-adjust column widths
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws.column_dimensions[column].width = adjusted_width
+    for row_data in chain(sample, rows):
+        ws.append([
+            styled_cell(value, border=thin_border, alignment=data_alignment)
+            for value in row_data
+        ])
 
     # Save to buffer
-    buffer = BytesIO()
+    buffer = report_buffer()
     wb.save(buffer)
     buffer.seek(0)
     return buffer
@@ -97,50 +176,32 @@ def create_pdf_report(title, headers, data, filename_prefix, orientation='portra
         orientation: 'portrait' or 'landscape'
 
     Returns:
-        BytesIO buffer containing the PDF file
+        File object (rewound) containing the PDF file
     """
-    buffer = BytesIO()
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+    buffer = report_buffer()
 
     pagesize = landscape(A4) if orientation == 'landscape' else A4
     doc = SimpleDocTemplate(buffer, pagesize=pagesize, topMargin=20*mm, bottomMargin=20*mm)
 
     elements = []
-    styles = getSampleStyleSheet()
-
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#16a34a'),
-        spaceAfter=10
-    )
-
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.grey,
-        spaceAfter=20
-    )
+    styles = pdf_styles()
 
     # Title
-    elements.append(Paragraph(title, title_style))
-    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %b %Y %H:%M')}", subtitle_style))
+    elements.append(Paragraph(title, styles['ReportTitle']))
+    elements.append(Paragraph(f"Generated: {datetime.now().strftime('%d %b %Y %H:%M')}", styles['ReportSubtitle']))
     elements.append(Spacer(1, 10))
 
-    # Table data
-    table_data = [headers] + data
-
     # Calculate column widths
     page_width = pagesize[0] - 40*mm
     col_width = page_width / len(headers)
 
-    table = Table(table_data, colWidths=[col_width] * len(headers))
-
     # Table styling
-    table_style = TableStyle([
-        # Header styling
+    header_style = [
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#16a34a')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
@@ -148,23 +209,35 @@ def create_pdf_report(title, headers, data, filename_prefix, orientation='portra
         ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
         ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
         ('TOPPADDING', (0, 0), (-1, 0), 8),
-
-        # Data styling
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-        ('TOPPADDING', (0, 1), (-1, -1), 6),
-
-        # Alternating row colors
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f0fdf4')]),
-
-        # Grid
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-    ])
-
-    table.setStyle(table_style)
-    elements.append(table)
+    ]
+
+    def data_style(first_row):
+        return [
+            ('FONTNAME', (0, first_row), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, first_row), (-1, -1), 9),
+            ('ALIGN', (0, first_row), (-1, -1), 'LEFT'),
+            ('BOTTOMPADDING', (0, first_row), (-1, -1), 6),
+            ('TOPPADDING', (0, first_row), (-1, -1), 6),
+
+            # Alternating row colors
+            ('ROWBACKGROUNDS', (0, first_row), (-1, -1), [colors.white, colors.HexColor('#f0fdf4')]),
+
+            # Grid
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+        ]
+
+    # One Table per block of rows: Platypus re-measures a table every time it
+    # splits it across a page, so a single huge table gets slower per page.
+    # Blocks hold an even number of rows so the row shading carries on seamlessly.
+    for start in range(0, max(len(data), 1), PDF_TABLE_CHUNK_ROWS):
+        block = data[start:start + PDF_TABLE_CHUNK_ROWS]
+        if start == 0:
+            table = Table([headers] + block, colWidths=[col_width] * len(headers))
+            table.setStyle(TableStyle(header_style + data_style(1)))
+        else:
+            table = Table(block, colWidths=[col_width] * len(headers))
+            table.setStyle(TableStyle(data_style(0)))
+        elements.append(table)
 
     # Build PDF
     doc.build(elements)
@@ -172,6 +245,31 @@ def create_pdf_report(title, headers, data, filename_prefix, orientation='portra
     return buffer
 
 
+def generate_csv(headers, rows):
+    """
+    Yield a CSV document in chunks of CSV_CHUNK_ROWS rows.
+
+    Args:
+        headers: List of column headers
+        rows: Iterable of rows (each row is a list of values); may be a generator
+
+    Yields:
+        CSV text, suitable for a streamed response
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
 def format_currency(amount):
     """Format amount as South African Rand."""
     if amount is None:
@@ -185,7 +283,7 @@ def format_date(dt):
         return "-"
     if isinstance(dt, str):
         return dt
-    return dt.strftime('%d %b %Y')
+    return f"{dt.day:02d} {MONTH_ABBR[dt.month]} {dt.year}"
 
 
 def format_datetime(dt):
@@ -194,4 +292,4 @@ def format_datetime(dt):
         return "-"
     if isinstance(dt, str):
         return dt
-    return dt.strftime('%d %b %Y %H:%M')
+    return f"{dt.day:02d} {MONTH_ABBR[dt.month]} {dt.year} {dt.hour:02d}:{dt.minute:02d}"
@@ -22,7 +22,7 @@ def can_schedule(staff_id, schedule_date):
     Returns False if they have approved leave that day.
     """
     if isinstance(schedule_date, str):
-        schedule_date = datetime.strptime(schedule_date, '%Y-%m-%d').date()
+        schedule_date = date.fromisoformat(schedule_date)
 
     approved_leave = LeaveRequest.query.filter(
         LeaveRequest.staff_id == staff_id,
@@ -37,7 +37,7 @@ def can_schedule(staff_id, schedule_date):
 def get_leave_for_date(staff_id, check_date):
     """Get approved leave for a staff member on a specific date."""
     if isinstance(check_date, str):
-        check_date = datetime.strptime(check_date, '%Y-%m-%d').date()
+        check_date = date.fromisoformat(check_date)
 
     return LeaveRequest.query.filter(
         LeaveRequest.staff_id == staff_id,
@@ -63,8 +63,27 @@ def get_week_start(dt=None):
     if dt is None:
         dt = date.today()
     if isinstance(dt, str):
-        dt = datetime.strptime(dt, '%Y-%m-%d').date()
+        dt = date.fromisoformat(dt)
 
     # Calculate days since Monday (Monday = 0)
     days_since_monday = dt.weekday()
     return dt - timedelta(days=days_since_monday)
+
+
+def count_weekdays(start_date, end_date):
+    """
+    Count the Monday-Friday days from start_date to end_date inclusive.
+    Whole weeks contribute 5 each, so no day-by-day loop is needed.
+    """
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return 0
+
+    weeks, extra = divmod(days, 7)
+    # The leftover days cover weekday positions first..first + extra - 1 (Monday = 0),
+    # which can run into the next week: count their overlap with Mon-Fri of both weeks
+    first = start_date.weekday()
+    last = first + extra
+    this_week = max(0, min(last, 5) - first)
+    next_week = max(0, min(last, 12) - 7)
+    return weeks * 5 + this_week + next_week
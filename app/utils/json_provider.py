@@ -0,0 +1,25 @@
+"""JSON provider backed by orjson, used for jsonify() and the tojson filter."""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialize with orjson instead of the stdlib json module.
+    Dates, decimals and other non-native types still go through Flask's
+    default() so responses look the same as with the default provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        # Hooks such as the session serializer's object_hook need the stdlib decoder
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
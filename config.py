@@ -16,11 +16,19 @@ class Config:
         'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'stafftrack.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # PostgreSQL connection pool settings for Supabase
+    # Connection settings for every database
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_pre_ping': True,
         'pool_recycle': 300,
+        # Rows per multi-VALUES INSERT when executemany() batches bulk writes
+        'insertmanyvalues_page_size': 1000,
     }
+    # Pool sizing for server databases (SQLite's pools reject these arguments).
+    # Each process keeps its own pool, so keep these small on serverless deploys
+    # (e.g. DB_POOL_SIZE=1, DB_MAX_OVERFLOW=2 on Vercel) to stay under Supabase's connection limit
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS['pool_size'] = int(os.environ.get('DB_POOL_SIZE', 5))
+        SQLALCHEMY_ENGINE_OPTIONS['max_overflow'] = int(os.environ.get('DB_MAX_OVERFLOW', 5))
 
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads', 'sop_documents')
@@ -45,3 +53,21 @@ class Config:
 
     # Enable/disable email notifications
     MAIL_ENABLED = os.environ.get('MAIL_ENABLED', 'false').lower() == 'true'
+
+    # Response compression (Flask-Compress): gzip/brotli for pages, assets, JSON API responses
+    # and CSV/PDF exports (xlsx is left out, it is already a zip archive)
+    COMPRESS_MIMETYPES = [
+        'text/html', 'text/css', 'application/javascript', 'application/json',
+        'text/csv', 'application/pdf',
+    ]
+    COMPRESS_LEVEL = 6
+    # Streamed responses (the CSV exports) are compressed too, including for gzip-only
+    # clients (Flask-Compress leaves gzip out of its streaming algorithms by default)
+    COMPRESS_STREAMS = True
+    COMPRESS_ALGORITHM_STREAMING = ['zstd', 'br', 'gzip', 'deflate']
+
+    # Caching (Flask-Caching): in-process by default; set CACHE_TYPE=RedisCache and
+    # CACHE_REDIS_URL to share the cache between workers
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = 300
@@ -5,7 +5,6 @@ Main entry point for the application.
 
 from app import create_app, db
 from app.models import User
-from werkzeug.security import generate_password_hash
 import os
 
 app = create_app()
@@ -22,12 +21,12 @@ def init_db():
         if not admin:
             admin = User(
                 username='admin',
-                password_hash=generate_password_hash('admin123'),
                 full_name='Dr. Buleni',
                 role='Super Admin',
                 email='admin@stafftrack.local',
                 status='Active'
             )
+            admin.set_password('admin123')
             db.session.add(admin)
             db.session.commit()
             print("=" * 50)